@@ -0,0 +1,82 @@
+"""
+비활성화된 약품의 대체 약품 추천.
+
+같은 class_type 안에서 성분 집합의 Jaccard 유사도가 높은 순으로 이웃 목록을
+카탈로그 파일(build_catalog.py)이나 스냅샷을 발행할 때(catalog.publish_snapshot) 미리 계산해
+파일에 넣어 두고, 각 프로세스는 읽기만 합니다. 성분 집합은 성분 번호를 비트로 하는
+정수 비트셋으로 표현해 교집합/합집합 크기를 비트 연산과 popcount로 구합니다.
+
+후보는 성분 → 약품 역색인으로 성분을 하나 이상 공유하는 약품만 비교하고,
+모자라면 같은 분류의 나머지 약품(유사도 0)으로 채웁니다.
+화면에서는 현재 프로필 기준으로 선택 가능한 이웃만 앞에서부터 k개 보여줍니다.
+"""
+import heapq
+from collections import defaultdict
+
+# 약품마다 미리 저장해 둘 이웃 수 (선택 불가 이웃을 걸러낸 뒤에도 k개가 남도록 넉넉히)
+ALTERNATIVE_CANDIDATES = 30
+
+
+def ingredient_bitsets(med_db, sorted_ingredients):
+    """약품명 → 성분 비트셋(int)"""
+    bit = {ing: 1 << i for i, ing in enumerate(sorted_ingredients)}
+    return {
+        name: sum(bit[ing] for ing in med.ingredients)
+        for name, med in med_db.items()
+    }
+
+
+def jaccard(a, b):
+    union = (a | b).bit_count()
+    return (a & b).bit_count() / union if union else 0.0
+
+
+def build_alternatives(med_db, sorted_ingredients=None, limit=ALTERNATIVE_CANDIDATES):
+    """
+    약품명 → 같은 class_type 안의 유사 약품명 튜플 (유사도 내림차순, 같으면 카탈로그 순)
+    """
+    if sorted_ingredients is None:
+        sorted_ingredients = sorted({ing for med in med_db.values() for ing in med.ingredients})
+    bitsets = ingredient_bitsets(med_db, sorted_ingredients)
+    order = {name: i for i, name in enumerate(med_db)}
+
+    by_class = defaultdict(list)
+    index = defaultdict(list)  # (class_type, 성분) → 약품명
+    for name, med in med_db.items():
+        by_class[med.class_type].append(name)
+        for ing in med.ingredients:
+            index[(med.class_type, ing)].append(name)
+
+    alternatives = {}
+    for name, med in med_db.items():
+        candidates = set()
+        for ing in med.ingredients:
+            candidates.update(index[(med.class_type, ing)])
+        candidates.discard(name)
+
+        ranked = heapq.nsmallest(
+            limit, candidates,
+            key=lambda other: (-jaccard(bitsets[name], bitsets[other]), order[other]),
+        )
+
+        # 성분을 공유하는 약품이 모자라면 같은 분류의 나머지 약품으로 채움
+        if len(ranked) < limit:
+            for other in by_class[med.class_type]:
+                if len(ranked) >= limit:
+                    break
+                if other != name and other not in candidates:
+                    ranked.append(other)
+
+        alternatives[name] = tuple(ranked)
+    return alternatives
+
+
+def safe_alternatives(catalog, name, eligibility, k=3):
+    """현재 eligibility 기준 선택 가능한 대체 약품을 최대 k개 반환합니다."""
+    result = []
+    for other in catalog.alternatives.get(name, ()):
+        if not eligibility[other][0]:
+            result.append(other)
+            if len(result) == k:
+                break
+    return result
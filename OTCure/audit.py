@@ -0,0 +1,247 @@
+"""
+판매(조제) 기록 일괄 점검 도구.
+
+대용량 판매 기록 덤프를 고객·날짜별 장바구니로 묶어 앱과 같은 검사를 수행합니다.
+    - 성분 중복 (두 개 이상의 약품에 같은 성분)
+    - WARNING_RULES 분류 중복 규칙
+    - MAX_DOSE_DB 일일 최대 복용량 (기록 한 줄을 1회 복용분으로 보고 QTY만큼 합산)
+
+입력 (CSV 또는 XML, 여러 파일 가능):
+    CUSTOMER_ID, DISPENSED_AT("2026-10-19 10:15" 또는 "2026-10-19"), ITEM_NAME, QTY(생략 시 1)
+
+처리 순서:
+    1. 입력을 한 줄씩 읽으며 고객 ID 해시로 파티션 임시 파일에 나눠 씁니다(메모리 사용량 일정).
+    2. 프로세스 풀의 작업자마다 파티션 하나를 맡아 고객·날짜별로 묶고 검사합니다.
+       작업자는 시작할 때 카탈로그를 한 번 읽고(catalog.get_catalog, 공유 세그먼트 설정 시 붙기만 함),
+       같은 약품 조합의 분석은 safety.analyze_basket 캐시를 재사용합니다.
+    3. 걸린 장바구니는 JSONL로, 집계는 JSON으로 저장합니다.
+
+실행 (샘플):
+    python audit.py samples/dispensing.csv --output flagged.jsonl --summary audit_summary.json
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from build_catalog import iter_records, normalize_product_name
+from catalog import get_catalog
+from safety import analyze_basket, exceeded_ingredients, snapshot_cache
+
+CUSTOMER_FIELD = "CUSTOMER_ID"
+DATE_FIELD = "DISPENSED_AT"
+PRODUCT_FIELD = "ITEM_NAME"
+QTY_FIELD = "QTY"
+
+# 작업자 수 대비 파티션 수 (파티션 크기 편차를 줄이기 위해 넉넉히 나눔)
+PARTITIONS_PER_WORKER = 4
+# 작업자별 일일 한도 검사 결과 캐시 크기 (약품·수량 조합 수)
+DAILY_LIMIT_CACHE_SIZE = 4096
+
+_catalog = None
+
+
+def _init_worker():
+    global _catalog
+    _catalog = get_catalog()
+
+
+def resolve_product(med_db, raw_name):
+    """기록의 제품명을 카탈로그 약품명으로 찾습니다. 없으면 None."""
+    if raw_name in med_db:
+        return raw_name
+    name = normalize_product_name(raw_name)
+    return name if name in med_db else None
+
+
+def partition_records(paths, directory, partitions):
+    """
+    입력 파일들을 고객 ID 기준으로 파티션 파일에 나눠 씁니다.
+    (파티션 파일 경로 목록, 읽은 행 수, 형식 오류로 건너뛴 행 수)를 반환합니다.
+    """
+    part_paths = [os.path.join(directory, f"part-{i:04d}.csv") for i in range(partitions)]
+    files = [open(path, "w", encoding="utf-8", newline="") for path in part_paths]
+    writers = [csv.writer(f) for f in files]
+    rows = skipped = 0
+    try:
+        for path in paths:
+            for record in iter_records(path):
+                rows += 1
+                customer = (record.get(CUSTOMER_FIELD) or "").strip()
+                day = (record.get(DATE_FIELD) or "").strip()[:10].replace("/", "-").replace(".", "-")
+                product = (record.get(PRODUCT_FIELD) or "").strip()
+                qty = (record.get(QTY_FIELD) or "1").strip() or "1"
+                if not customer or len(day) != 10 or not product or not qty.isdigit():
+                    skipped += 1
+                    continue
+                part = zlib.crc32(customer.encode("utf-8")) % partitions
+                writers[part].writerow((customer, day, product, qty))
+    finally:
+        for f in files:
+            f.close()
+    return part_paths, rows, skipped
+
+
+@snapshot_cache(maxsize=DAILY_LIMIT_CACHE_SIZE)
+def _daily_exceeded(catalog, counts):
+    """((약품명, 수량), ...) 조합의 하루 합계가 일일 최대 복용량을 넘는 성분 {성분: (누적량, 최대량)}"""
+    totals = defaultdict(float)
+    for name, qty in counts:
+        for ing, amount in catalog.med_db[name].ingredients.items():
+            totals[ing] += amount * qty
+    return exceeded_ingredients(totals, catalog.max_dose_db)
+
+
+def audit_basket(catalog, counts):
+    """
+    장바구니 하나({약품명: 수량})를 검사해 (중복 성분, 걸린 규칙 [(이름, level, message)], 초과 성분)을 반환합니다.
+    """
+    analysis = analyze_basket(catalog, frozenset(counts))
+    rules = [
+        (rule_name, level, message)
+        for rule_name, (level, message) in zip(analysis.rules, analysis.warnings)
+    ]
+    exceeded = _daily_exceeded(catalog, tuple(sorted(counts.items())))
+    return analysis.duplicate_ingredients, rules, exceeded
+
+
+def audit_partition(part_path, output_path):
+    """파티션 파일 하나를 고객·날짜별로 묶어 검사하고, 걸린 장바구니를 output_path에 씁니다. 집계를 반환합니다."""
+    catalog = _catalog or get_catalog()
+    baskets = defaultdict(dict)  # (고객, 날짜) → {약품명: 수량}
+    unknown = defaultdict(dict)  # (고객, 날짜) → 카탈로그에 없는 제품명
+    resolved = {}
+    with open(part_path, encoding="utf-8", newline="") as f:
+        for customer, day, product, qty in csv.reader(f):
+            if product not in resolved:
+                resolved[product] = resolve_product(catalog.med_db, product)
+            name = resolved[product]
+            counts = unknown[(customer, day)] if name is None else baskets[(customer, day)]
+            key = product if name is None else name
+            counts[key] = counts.get(key, 0) + int(qty)
+
+    stats = {
+        "baskets": len(baskets.keys() | unknown.keys()),
+        "customers": len({customer for customer, _ in baskets.keys() | unknown.keys()}),
+        "flagged_baskets": 0,
+        "checks": Counter(),
+        "rules": Counter(),
+        "duplicate_ingredients": Counter(),
+        "exceeded_ingredients": Counter(),
+        "flagged_products": Counter(),
+        "unknown_products": Counter(),
+    }
+    for key in unknown:
+        stats["unknown_products"].update(unknown[key])
+
+    with open(output_path, "w", encoding="utf-8") as out:
+        for (customer, day) in sorted(baskets):
+            counts = baskets[(customer, day)]
+            duplicates, rules, exceeded = audit_basket(catalog, counts)
+            if not (duplicates or rules or exceeded):
+                continue
+
+            stats["flagged_baskets"] += 1
+            stats["checks"].update(
+                check for check, hit in
+                (("duplicate_ingredient", duplicates), ("warning_rule", rules), ("daily_limit", exceeded))
+                if hit
+            )
+            stats["rules"].update(rule_name for rule_name, _, _ in rules)
+            stats["duplicate_ingredients"].update(duplicates.keys())
+            stats["exceeded_ingredients"].update(exceeded.keys())
+            stats["flagged_products"].update(counts.keys())
+
+            out.write(json.dumps({
+                "customer": customer,
+                "date": day,
+                "products": dict(counts),
+                "duplicates": {ing: list(sources) for ing, sources in duplicates.items()},
+                "warnings": [
+                    {"rule": rule_name, "level": level, "message": message}
+                    for rule_name, level, message in rules
+                ],
+                "exceeded": {ing: {"total": total, "max": max_dose} for ing, (total, max_dose) in exceeded.items()},
+                "unknown_products": unknown.get((customer, day), {}),
+            }, ensure_ascii=False) + "\n")
+    return stats
+
+
+def merge_stats(parts):
+    merged = {}
+    for stats in parts:
+        for key, value in stats.items():
+            if isinstance(value, Counter):
+                merged.setdefault(key, Counter()).update(value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def run_audit(paths, output_path, workers=None, tmp_dir=None):
+    """입력 파일들을 검사해 output_path에 걸린 장바구니를 쓰고 요약 집계 dict를 반환합니다."""
+    workers = workers or os.cpu_count()
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="otcure-audit-", dir=tmp_dir) as work_dir:
+        part_paths, rows, skipped = partition_records(paths, work_dir, workers * PARTITIONS_PER_WORKER)
+        partitioned = time.perf_counter()
+
+        flagged_paths = [f"{path}.flagged.jsonl" for path in part_paths]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            parts = list(pool.map(audit_partition, part_paths, flagged_paths))
+
+        with open(output_path, "wb") as out:
+            for path in flagged_paths:
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, out)
+
+    stats = merge_stats(parts)
+    elapsed = time.perf_counter() - started
+    return {
+        "catalog_version": get_catalog().version,
+        "rows": rows,
+        "skipped_rows": skipped,
+        "baskets": stats.get("baskets", 0),
+        "customers": stats.get("customers", 0),
+        "flagged_baskets": stats.get("flagged_baskets", 0),
+        "checks": dict(stats.get("checks", Counter()).most_common()),
+        "rules": dict(stats.get("rules", Counter()).most_common()),
+        "duplicate_ingredients": dict(stats.get("duplicate_ingredients", Counter()).most_common()),
+        "exceeded_ingredients": dict(stats.get("exceeded_ingredients", Counter()).most_common()),
+        "flagged_products": dict(stats.get("flagged_products", Counter()).most_common()),
+        "unknown_products": dict(stats.get("unknown_products", Counter()).most_common()),
+        "seconds": {
+            "partition": round(partitioned - started, 2),
+            "audit": round(elapsed - (partitioned - started), 2),
+            "total": round(elapsed, 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OTCure 판매 기록 일괄 점검")
+    parser.add_argument("inputs", nargs="+", help="판매 기록 파일 (CSV/XML)")
+    parser.add_argument("--output", default="flagged.jsonl", help="걸린 장바구니 (JSONL)")
+    parser.add_argument("--summary", default="audit_summary.json", help="요약 집계 (JSON)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--tmp-dir", help="파티션 임시 파일 위치 (기본: 시스템 임시 디렉터리)")
+    args = parser.parse_args()
+
+    summary = run_audit(args.inputs, args.output, args.workers, args.tmp_dir)
+    with open(args.summary, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=1)
+
+    total = summary["seconds"]["total"]
+    print(f"{summary['rows']}행, 장바구니 {summary['baskets']}개 중 {summary['flagged_baskets']}개 검출 "
+          f"-> {args.output}, {args.summary} "
+          f"({total:.1f}s, {summary['rows'] / total * 60 if total else 0:,.0f}행/분)")
+
+
+if __name__ == "__main__":
+    main()
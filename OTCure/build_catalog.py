@@ -0,0 +1,261 @@
+"""
+공공 의약품 허가정보 덤프로부터 OTCure 카탈로그 파일을 생성하는 빌드 도구.
+
+입력 (XML 또는 CSV, 페이지 단위로 나뉜 여러 파일 가능):
+    --products     제품 정보 (ITEM_SEQ, ITEM_NAME, ETC_OTC_NAME, CLASS_NAME, EE_DOC, UD_DOC)
+    --ingredients  제품별 성분 (ITEM_SEQ, INGR_NAME, QNT, UNIT)
+    --dur-pregnancy  DUR 임부금기 성분 (INGR_NAME, GRADE: 1 금기 / 2 주의)
+    --dur-elderly    DUR 노인주의 성분 (INGR_NAME)
+
+파일 하나가 프로세스 풀의 작업 하나가 되어 파싱과 정규화(성분명 NFKC/하이픈 통일,
+단위 mg 환산, 제품명 정리, 분류 매핑)가 병렬로 수행됩니다. 결과는 med_db.py가
+OTCURE_CATALOG 환경변수로 읽어들이는 JSON 카탈로그 파일로 저장되며, 이 약품 목록 기준의
+충돌 그래프(conflicts.py)와 대체 약품 목록(alternatives.py)도 함께 계산해 넣습니다.
+
+실행 (샘플 덤프):
+    python build_catalog.py --products samples/catalog/products_* \\
+        --ingredients samples/catalog/ingredients_* \\
+        --dur-pregnancy samples/catalog/dur_pregnancy.csv \\
+        --dur-elderly samples/catalog/dur_elderly.csv \\
+        --output catalog.json
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import time
+import unicodedata
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from alternatives import build_alternatives
+from conflicts import build_conflict_graph
+from med_db import MAX_DOSE_DB, Medication
+
+# 2: conflict_graph, alternatives 포함
+CATALOG_FORMAT = 2
+
+# 허가정보 분류번호 → 앱의 class_type
+CLASS_TYPE_BY_CODE = {
+    "01140": "해열진통제",
+    "01180": "감기약",
+    "01240": "진경제",
+    "01410": "항히스타민제",
+    "02340": "제산제",
+    "02330": "소화제",
+    "02350": "완하제",
+    "02390": "위장관치료제",
+    "02540": "피임약",
+}
+
+# 해열진통제 분류 중 이 성분을 포함하면 소염진통제로 분류
+NSAID_INGREDIENTS = {"이부프로펜", "덱시부프로펜", "나프록센"}
+
+# 단위 → mg 환산 계수
+UNIT_TO_MG = {
+    "mg": 1.0, "㎎": 1.0, "밀리그램": 1.0, "밀리그람": 1.0,
+    "g": 1000.0, "그램": 1000.0,
+    "mcg": 0.001, "µg": 0.001, "μg": 0.001, "㎍": 0.001, "마이크로그램": 0.001,
+}
+
+DETAIL_URL = "https://nedrug.mfds.go.kr/pbp/CCBBB01/getItemDetail?itemSeq={}"
+
+HYPHENS = dict.fromkeys(map(ord, "‐‑‒–—−"), "-")
+CLASS_NAME_PATTERN = re.compile(r"^\[(\d+)\]\s*(.*)$")
+# 제품명 끝의 "(성분명)" 표기
+NAME_SUFFIX_PATTERN = re.compile(r"\([^()]*\)$")
+
+
+def normalize_text(value):
+    """전각/호환 문자와 여러 종류의 하이픈을 통일하고 공백을 정리합니다."""
+    value = unicodedata.normalize("NFKC", value or "").translate(HYPHENS)
+    return " ".join(value.split())
+
+
+def normalize_product_name(value):
+    name = normalize_text(value)
+    name = NAME_SUFFIX_PATTERN.sub("", name).strip()
+    return name.replace("밀리그람", "mg").replace("밀리그램", "mg")
+
+
+def to_mg(quantity, unit):
+    """성분량을 mg으로 환산합니다. 알 수 없는 단위는 None을 반환합니다."""
+    factor = UNIT_TO_MG.get(normalize_text(unit).lower()) or UNIT_TO_MG.get(unit.strip())
+    try:
+        amount = float(str(quantity).replace(",", ""))
+    except ValueError:
+        return None
+    if factor is None:
+        return None
+    return round(amount * factor, 4)
+
+
+def iter_records(path):
+    """XML(<item> 단위) 또는 CSV 파일의 레코드를 dict로 하나씩 읽습니다."""
+    if path.lower().endswith(".xml"):
+        # 읽은 <item>을 부모(<items>)에서 떼어내야 전국 단위 덤프에서도 메모리가 일정합니다.
+        # (elem.clear()만 하면 빈 요소가 부모에 계속 쌓이고, <item>이 루트의 손자 이하라
+        #  루트를 비워도 파서가 열어 둔 <items>에 남습니다.)
+        open_elements = []
+        for event, elem in ET.iterparse(path, events=("start", "end")):
+            if event == "start":
+                open_elements.append(elem)
+                continue
+            open_elements.pop()
+            if elem.tag == "item":
+                yield {child.tag: (child.text or "").strip() for child in elem}
+                elem.clear()
+                if open_elements:
+                    open_elements[-1].remove(elem)
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+
+
+def parse_ingredient_file(path):
+    """성분 파일 하나 → ({ITEM_SEQ: {성분: mg}}, 건너뛴 행 수)"""
+    ingredients = defaultdict(dict)
+    skipped = 0
+    for record in iter_records(path):
+        amount = to_mg(record.get("QNT", ""), record.get("UNIT", ""))
+        name = normalize_text(record.get("INGR_NAME"))
+        if amount is None or not name:
+            skipped += 1
+            continue
+        item = ingredients[record["ITEM_SEQ"].strip()]
+        item[name] = item.get(name, 0) + amount
+    return dict(ingredients), skipped
+
+
+def parse_product_file(path, include_etc=False):
+    """제품 파일 하나 → 정규화된 제품 목록 (성분 제외)"""
+    products = []
+    for record in iter_records(path):
+        if not include_etc and normalize_text(record.get("ETC_OTC_NAME")) != "일반의약품":
+            continue
+        match = CLASS_NAME_PATTERN.match(normalize_text(record.get("CLASS_NAME")))
+        class_code, class_name = match.groups() if match else ("", normalize_text(record.get("CLASS_NAME")))
+        item_seq = record["ITEM_SEQ"].strip()
+        products.append({
+            "item_seq": item_seq,
+            "name": normalize_product_name(record.get("ITEM_NAME")),
+            "description": normalize_text(record.get("EE_DOC")),
+            "usage": normalize_text(record.get("UD_DOC")),
+            "class_code": class_code,
+            "class_type": CLASS_TYPE_BY_CODE.get(class_code, class_name),
+            "url": DETAIL_URL.format(item_seq),
+        })
+    return products
+
+
+def load_dur_pregnancy(path):
+    if not path:
+        return {}
+    return {normalize_text(r["INGR_NAME"]): int(r["GRADE"]) for r in iter_records(path)}
+
+
+def load_dur_elderly(path):
+    if not path:
+        return set()
+    return {normalize_text(r["INGR_NAME"]) for r in iter_records(path)}
+
+
+def finalize_product(product, ingredients, dur_pregnancy, dur_elderly):
+    """성분, class_type, preg, age를 채워 앱의 Medication 필드 형식으로 만듭니다."""
+    class_type = product["class_type"]
+    if product["class_code"] == "01140" and NSAID_INGREDIENTS & ingredients.keys():
+        class_type = "소염진통제"
+
+    grades = [dur_pregnancy[ing] for ing in ingredients if ing in dur_pregnancy]
+    preg = min(grades) if grades else 0  # 1(금기)이 2(주의)보다 우선
+    age = 1 if dur_elderly & ingredients.keys() else 0
+
+    return {
+        "name": product["name"],
+        "description": product["description"],
+        "usage": product["usage"],
+        "ingredients": ingredients,
+        "class_type": class_type,
+        "preg": preg,
+        "age": age,
+        "url": product["url"],
+    }
+
+
+def build_catalog(product_paths, ingredient_paths, dur_pregnancy_path=None, dur_elderly_path=None,
+                  include_etc=False, workers=None, max_dose_db=MAX_DOSE_DB):
+    """덤프 파일들을 병렬로 파싱해 카탈로그 dict를 만듭니다."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        ingredient_jobs = pool.map(parse_ingredient_file, ingredient_paths)
+        product_jobs = pool.map(parse_product_file, product_paths, [include_etc] * len(product_paths))
+
+        ingredients_by_item = {}
+        skipped = 0
+        for partial, partial_skipped in ingredient_jobs:
+            # 한 제품의 성분 행이 여러 파일(페이지)에 나뉘어 있을 수 있으므로 성분별로 합산합니다.
+            for item_seq, ingredients in partial.items():
+                merged = ingredients_by_item.setdefault(item_seq, {})
+                for name, amount in ingredients.items():
+                    merged[name] = merged.get(name, 0) + amount
+            skipped += partial_skipped
+        products = [product for partial in product_jobs for product in partial]
+
+    dur_pregnancy = load_dur_pregnancy(dur_pregnancy_path)
+    dur_elderly = load_dur_elderly(dur_elderly_path)
+
+    medications = {}
+    missing_ingredients = []
+    for product in products:
+        ingredients = ingredients_by_item.get(product["item_seq"])
+        if not ingredients:
+            missing_ingredients.append(product["item_seq"])
+            continue
+        # 같은 이름이 여러 번 나오면 뒤에 나온(최신) 허가정보를 사용
+        medications[product["name"]] = finalize_product(product, ingredients, dur_pregnancy, dur_elderly)
+
+    med_objects = {name: Medication(**med) for name, med in medications.items()}
+    conflict_graph = build_conflict_graph(med_objects, max_dose_db)
+
+    return {
+        "format": CATALOG_FORMAT,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "medications": list(medications.values()),
+        "conflict_graph": conflict_graph,
+        "alternatives": build_alternatives(med_objects),
+        "stats": {
+            "products": len(products),
+            "medications": len(medications),
+            "missing_ingredients": len(missing_ingredients),
+            "skipped_ingredient_rows": skipped,
+            "over_limit_conflicts": sum(len(items) for items in conflict_graph.values()),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OTCure 카탈로그 빌드")
+    parser.add_argument("--products", nargs="+", required=True)
+    parser.add_argument("--ingredients", nargs="+", required=True)
+    parser.add_argument("--dur-pregnancy")
+    parser.add_argument("--dur-elderly")
+    parser.add_argument("--include-etc", action="store_true", help="전문의약품도 포함")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="catalog.json")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    catalog = build_catalog(args.products, args.ingredients, args.dur_pregnancy, args.dur_elderly,
+                            args.include_etc, args.workers)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=1)
+
+    stats = catalog["stats"]
+    print(f"{stats['medications']}개 약품 -> {args.output} "
+          f"(제품 {stats['products']}, 성분 누락 {stats['missing_ingredients']}, "
+          f"성분 행 건너뜀 {stats['skipped_ingredient_rows']}, {time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
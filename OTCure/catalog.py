@@ -0,0 +1,309 @@
+"""
+버전이 있는 불변 카탈로그 스냅샷과 무중단 교체(hot reload).
+
+약품(MED_DB), 최대 복용량(MAX_DOSE_DB), 경고 규칙(WARNING_RULES)을 한 번에 묶은
+스냅샷을 디렉터리에 버전별 파일로 발행하고, CURRENT 포인터 파일로 현재 버전을 가리킵니다.
+
+    snapshots/
+        catalog-20261019-101500-1a2b3c4d.json
+        CURRENT            # "20261019-101500-1a2b3c4d"
+
+실행 중인 프로세스는 CatalogStore의 백그라운드 스레드가 CURRENT를 주기적으로 확인하고,
+새 버전이 보이면 그 스레드에서 스냅샷을 읽고 파생 데이터를 만든 뒤 참조만 원자적으로 교체합니다.
+각 rerun/요청은 시작할 때 current()로 받은 스냅샷을 끝까지 사용하므로
+교체 도중에도 한 번의 실행 안에서 버전이 섞이지 않습니다.
+
+OTCURE_SHARED_CATALOG_DIR(예: /dev/shm/otcure)를 지정하면 스냅샷을 shared_catalog.py의
+공유 세그먼트로 컴파일해 같은 호스트의 워커들이 읽기 전용 mmap으로 함께 사용합니다.
+버전마다 한 프로세스만 세그먼트를 만들고, 나머지는 파생 데이터를 다시 계산하지 않고 붙기만 합니다.
+
+발행:
+    python catalog.py publish --dir snapshots [--from catalog.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import med_db
+import shared_catalog
+from alternatives import build_alternatives
+from conflicts import build_conflict_graph, ingredient_index, load_conflict_graph
+from med_db import Medication
+
+CURRENT_POINTER = "CURRENT"
+BUILTIN_VERSION = "builtin"
+
+# 스냅샷 디렉터리 (없으면 med_db.py의 내장 카탈로그만 사용)
+CATALOG_DIR = os.environ.get("OTCURE_CATALOG_DIR")
+# CURRENT 포인터 확인 주기 (초)
+CATALOG_POLL_INTERVAL = float(os.environ.get("OTCURE_CATALOG_POLL_INTERVAL", 5))
+# 워커 간 공유 세그먼트를 둘 디렉터리 (없으면 프로세스마다 스냅샷을 따로 만듦)
+SHARED_CATALOG_DIR = os.environ.get("OTCURE_SHARED_CATALOG_DIR")
+
+
+class Catalog:
+    """
+    한 버전의 카탈로그와 규칙, 그리고 미리 계산된 파생 데이터를 담는 불변 스냅샷.
+    같은 버전이면 같은 스냅샷으로 취급합니다(캐시 키로 사용 가능).
+    """
+    def __init__(self, version, medications, max_dose_db, warning_rules, conflict_graph=None,
+                 alternatives=None):
+        self.version = version
+        self.med_db = MappingProxyType(dict(medications))
+        self.max_dose_db = MappingProxyType(dict(max_dose_db))
+        self.warning_rules = MappingProxyType(dict(warning_rules))
+
+        # --- 파생 데이터: 스냅샷을 만들 때 한 번만 계산 ---
+        all_ingredients = set()
+        for med in self.med_db.values():
+            all_ingredients.update(med.ingredients.keys())
+        self.sorted_ingredients = tuple(sorted(all_ingredients))
+        # 약품명 → 카탈로그 내 순서 (화면에 표시되는 체크박스 순서)
+        self.order = MappingProxyType({name: i for i, name in enumerate(self.med_db)})
+        self.conflict_graph = MappingProxyType(dict(conflict_graph or {}))
+        # 성분 → 포함 약품명 (성분 중복 조합은 저장하지 않고 이 역색인에서 구함)
+        self.ingredient_index = MappingProxyType(
+            {ing: tuple(names) for ing, names in ingredient_index(self.med_db).items()}
+        )
+        # 약품명 → 같은 분류의 성분 유사 약품 (대체 약품 추천용)
+        # 스냅샷/카탈로그 파일에 미리 계산된 목록이 없을 때(손으로 쓴 내장 카탈로그)만 여기서 계산합니다.
+        if alternatives is None:
+            alternatives = build_alternatives(self.med_db, self.sorted_ingredients)
+        self.alternatives = MappingProxyType({name: tuple(others) for name, others in alternatives.items()})
+        # 이 스냅샷에 대한 계산 결과 캐시 (safety.snapshot_cache, 스냅샷과 함께 해제)
+        self.caches = {}
+
+    @classmethod
+    def from_segment(cls, segment):
+        """
+        공유 세그먼트 위에 스냅샷을 만듭니다. 약품/순서/역색인/충돌 그래프/대체 약품은
+        세그먼트를 직접 조회하므로 프로세스마다 다시 만들지 않습니다.
+        """
+        catalog = cls.__new__(cls)
+        header = segment.header
+        catalog.version = header["version"]
+        catalog.med_db = MappingProxyType(shared_catalog.SharedMedDB(segment))
+        catalog.max_dose_db = MappingProxyType(header["max_dose_db"])
+        catalog.warning_rules = MappingProxyType(header["warning_rules"])
+        catalog.sorted_ingredients = segment.sorted_ingredients()
+        catalog.order = MappingProxyType(shared_catalog.SharedOrder(segment))
+        catalog.conflict_graph = MappingProxyType(shared_catalog.SharedConflictGraph(segment))
+        catalog.ingredient_index = MappingProxyType(shared_catalog.SharedIngredientIndex(segment))
+        catalog.alternatives = MappingProxyType(shared_catalog.SharedAlternatives(segment))
+        catalog.caches = {}
+        return catalog
+
+    def __eq__(self, other):
+        return isinstance(other, Catalog) and self.version == other.version
+
+    def __hash__(self):
+        return hash(self.version)
+
+    def __repr__(self):
+        return f"Catalog(version={self.version!r}, medications={len(self.med_db)})"
+
+
+def builtin_catalog():
+    """med_db.py에 정의된(또는 OTCURE_CATALOG로 읽은) 카탈로그의 스냅샷"""
+    if SHARED_CATALOG_DIR:
+        # 내장 카탈로그는 배포마다 내용이 바뀔 수 있으므로 내용 해시로 세그먼트를 구분합니다.
+        return _shared(f"{BUILTIN_VERSION}-{_builtin_digest()[:16]}", _builtin_catalog)
+    return _builtin_catalog()
+
+
+def _builtin_digest():
+    """
+    내장 카탈로그 세그먼트에 들어가는 모든 내용의 해시.
+    약품, 최대 복용량, 경고 규칙과 파일에서 읽는 파생 데이터(충돌 그래프, 대체 약품 목록)를 넣고,
+    없어서 새로 계산하는 파생 데이터는 입력인 약품·최대 복용량이 이미 포함되어 있습니다.
+    """
+    body = {
+        "medications": {key: vars(med) for key, med in med_db.MED_DB.items()},
+        "max_dose_db": med_db.MAX_DOSE_DB,
+        "warning_rules": med_db.WARNING_RULES,
+        "derived": med_db.CATALOG_DERIVED if med_db.CATALOG_PATH else {"conflict_graph": load_conflict_graph()},
+    }
+    text = json.dumps(body, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _builtin_catalog():
+    return Catalog(BUILTIN_VERSION, med_db.MED_DB, med_db.MAX_DOSE_DB, med_db.WARNING_RULES,
+                   _builtin_conflict_graph(), med_db.CATALOG_DERIVED.get("alternatives"))
+
+
+def _builtin_conflict_graph():
+    """
+    내장 카탈로그의 충돌 그래프. 저장소의 conflict_graph.json은 med_db.py의 MED_DB 기준이므로
+    OTCURE_CATALOG로 약품 목록을 바꾼 경우 카탈로그 파일에 든 그래프를 쓰고,
+    그래프가 없는 (이전 형식) 파일이면 그 약품 목록으로 다시 계산합니다.
+    """
+    if not med_db.CATALOG_PATH:
+        return load_conflict_graph()
+    graph = med_db.CATALOG_DERIVED.get("conflict_graph")
+    if graph is None:
+        graph = build_conflict_graph(med_db.MED_DB, med_db.MAX_DOSE_DB)
+    return graph
+
+
+def _shared(key, build_catalog):
+    segment = shared_catalog.attach_or_export(SHARED_CATALOG_DIR, key, build_catalog)
+    return Catalog.from_segment(segment)
+
+
+def snapshot_path(directory, version):
+    return os.path.join(directory, f"catalog-{version}.json")
+
+
+def read_current_version(directory):
+    try:
+        with open(os.path.join(directory, CURRENT_POINTER), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_snapshot(directory, version):
+    """발행된 스냅샷 파일을 읽어 Catalog를 만듭니다."""
+    if SHARED_CATALOG_DIR:
+        return _shared(version, lambda: _load_snapshot(directory, version))
+    return _load_snapshot(directory, version)
+
+
+def _load_snapshot(directory, version):
+    with open(snapshot_path(directory, version), encoding="utf-8") as f:
+        data = json.load(f)
+    medications = {med["name"]: Medication(**med) for med in data["medications"]}
+    return Catalog(data["version"], medications, data["max_dose_db"], data["warning_rules"],
+                   data.get("conflict_graph"), data.get("alternatives"))
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def publish_snapshot(directory, medications, max_dose_db, warning_rules):
+    """
+    새 스냅샷을 발행합니다. 스냅샷 파일을 먼저 완전히 쓴 뒤 CURRENT를 교체하므로
+    읽는 쪽은 항상 완성된 파일만 보게 됩니다. 발행된 버전 문자열을 반환합니다.
+    """
+    os.makedirs(directory, exist_ok=True)
+    med_dicts = [vars(med) if isinstance(med, Medication) else med for med in medications]
+    body = {
+        "medications": med_dicts,
+        "max_dose_db": dict(max_dose_db),
+        "warning_rules": dict(warning_rules),
+    }
+    digest = hashlib.sha256(json.dumps(body, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{digest[:8]}"
+
+    # 충돌 그래프와 대체 약품 목록은 발행 시점에 미리 계산해 스냅샷에 포함합니다.
+    med_objects = {med["name"]: Medication(**med) for med in med_dicts}
+    body["conflict_graph"] = build_conflict_graph(med_objects, max_dose_db)
+    body["alternatives"] = build_alternatives(med_objects)
+    body["version"] = version
+
+    _write_atomic(snapshot_path(directory, version), json.dumps(body, ensure_ascii=False))
+    _write_atomic(os.path.join(directory, CURRENT_POINTER), version)
+    return version
+
+
+class CatalogStore:
+    """
+    프로세스 전체가 공유하는 현재 카탈로그 참조.
+    start()를 호출하면 백그라운드 스레드가 새 버전을 감지해 교체합니다.
+    """
+    def __init__(self, directory=None, poll_interval=CATALOG_POLL_INTERVAL):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self._current = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+        if directory and read_current_version(directory):
+            self._current = load_snapshot(directory, read_current_version(directory))
+        else:
+            self._current = builtin_catalog()
+
+    def current(self):
+        """현재 스냅샷을 반환합니다. 호출자는 한 번의 rerun/요청 동안 이 객체를 계속 사용합니다."""
+        return self._current
+
+    def reload_if_changed(self):
+        """CURRENT가 가리키는 버전이 바뀌었으면 새 스냅샷을 만들어 교체합니다."""
+        if not self.directory:
+            return False
+        version = read_current_version(self.directory)
+        if not version or version == self._current.version:
+            return False
+        snapshot = load_snapshot(self.directory, version)
+        # 참조 대입 한 번으로 교체 (진행 중인 rerun은 이전 스냅샷을 계속 사용)
+        self._current = snapshot
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.reload_if_changed()
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # 잘못된 스냅샷이 발행돼도 기존 버전으로 계속 서비스합니다.
+                print(f"[catalog] reload failed, keeping {self._current.version}: {e!r}")
+
+    def start(self):
+        """
+        감시 스레드를 시작합니다. 이미 실행 중이면 아무것도 하지 않으며,
+        fork 이후 자식 프로세스에서 다시 호출하면 그 프로세스의 감시 스레드를 새로 띄웁니다.
+        """
+        with self._lock:
+            if self.directory and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._watch, name="catalog-watcher", daemon=True)
+                self._thread.start()
+        return self
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store(start=True):
+    """
+    OTCURE_CATALOG_DIR 설정에 따른 프로세스 공용 CatalogStore (최초 호출 시 생성 및 감시 시작).
+    fork 전에 카탈로그만 읽어 둘 때는 start=False로 만들고, fork 후 각 프로세스에서 start()합니다.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CatalogStore(CATALOG_DIR)
+                if start:
+                    _store.start()
+    return _store
+
+
+def get_catalog():
+    """현재 카탈로그 스냅샷"""
+    return get_store().current()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OTCure 카탈로그 스냅샷 발행")
+    sub = parser.add_subparsers(dest="command", required=True)
+    publish = sub.add_parser("publish", help="새 버전 스냅샷을 발행하고 CURRENT를 교체")
+    publish.add_argument("--dir", required=True, help="스냅샷 디렉터리")
+    publish.add_argument("--from", dest="source",
+                         help="build_catalog.py 결과 파일 (없으면 med_db.py 내장 카탈로그)")
+    args = parser.parse_args()
+
+    medications = med_db.load_catalog(args.source) if args.source else med_db.MED_DB
+    version = publish_snapshot(args.dir, medications.values(), med_db.MAX_DOSE_DB, med_db.WARNING_RULES)
+    print(f"published {version} ({len(medications)} medications) -> {args.dir}")
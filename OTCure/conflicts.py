@@ -0,0 +1,180 @@
+"""
+카탈로그 전체의 위험 조합(충돌 그래프) 사전 계산.
+
+MED_DB의 약품 조합 중 용법상 하루 최대 복용 시 성분 합계가 MAX_DOSE_DB를 초과하는
+2~3개 조합("over_limit")을 찾아 JSON 파일로 저장합니다. 앱은 저장된 파일을 읽어
+약품별 "함께 복용 주의" 목록을 바로 보여줍니다.
+
+조합 수는 같은 성분을 가진 약품 수의 제곱/세제곱으로 늘어나므로 모든 조합을 저장하지 않습니다.
+    - 성분 중복("duplicate")은 저장하지 않고, 화면에 표시할 때 성분 → 약품 역색인에서
+      바로 구합니다 (conflicts_for).
+    - 초과 조합은 약품마다 초과 비율(합계 / 최대량)이 큰 순으로 MAX_CONFLICTS_PER_PRODUCT개만
+      저장합니다. 성분마다 약품을 하루 복용량 내림차순으로 정렬해 두고 상위 후보만 비교하므로
+      계산량은 약품 수에 비례합니다.
+3개 조합은 어떤 성분으로든 이미 초과하는 2개 조합을 포함하지 않는 경우만 기록합니다.
+
+실행:
+    python conflicts.py [--output conflict_graph.json]
+"""
+import argparse
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+
+from med_db import MAX_DOSE_DB, MED_DB
+from safety import daily_dose_count
+
+CONFLICT_GRAPH_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "conflict_graph.json")
+
+# 약품마다 저장/표시할 최대 조합 수
+MAX_CONFLICTS_PER_PRODUCT = 10
+
+
+def ingredient_index(med_db):
+    """성분 → 해당 성분을 포함하는 약품명 목록 (역색인, 카탈로그 순서)"""
+    index = defaultdict(list)
+    for name, med in med_db.items():
+        for ing in med.ingredients:
+            index[ing].append(name)
+    return index
+
+
+def _daily_amounts(med_db, names, ing, doses):
+    return np.array([med_db[name].ingredients[ing] * doses[name] for name in names], dtype=float)
+
+
+def _over_limit_candidates(names, amounts, limit, per_product):
+    """
+    한 성분에 대해 약품별로 하루 합계가 limit를 넘는 2개, 3개 조합 후보를 초과 비율 순으로 찾습니다.
+    amounts[i]는 names[i]를 용법대로 하루 최대 복용했을 때의 성분량입니다.
+    (약품명, 조합 튜플, 합계) 를 차례로 돌려줍니다.
+    """
+    order = np.argsort(-amounts, kind="stable")
+    ranked = amounts[order]
+    top = order[:per_product + 1]  # 자기 자신을 빼도 per_product개가 남도록
+
+    for i, amount in enumerate(amounts):
+        # 2개 조합: 양이 가장 많은 약품부터 초과하는 동안만
+        pairs = 0
+        for j in top:
+            if j == i:
+                continue
+            if amount + amounts[j] <= limit or pairs == per_product:
+                break
+            pairs += 1
+            yield names[i], (names[i], names[j]), amount + amounts[j]
+
+        # 3개 조합: i와 짝지어도 초과하지 않는 약품(정렬 순서상 연속 구간) 중 상위 후보끼리만 비교
+        start = np.searchsorted(-ranked, -(limit - amount), side="left")
+        window = [j for j in order[start:start + per_product + 1] if j != i][:per_product]
+        if len(window) < 2:
+            continue
+        rest = amounts[window]
+        sums = rest[:, None] + rest[None, :]
+        valid = np.triu((sums <= limit) & (amount + sums > limit), k=1)
+        hits = np.nonzero(valid)
+        for k in np.argsort(-sums[hits], kind="stable")[:per_product]:
+            a, b = window[hits[0][k]], window[hits[1][k]]
+            # 성분마다 정렬 순서가 달라도 같은 조합이 하나로 합쳐지도록 나머지 두 약품을 이름순으로 둡니다.
+            yield names[i], (names[i],) + tuple(sorted((names[a], names[b]))), amount + amounts[a] + amounts[b]
+
+
+def _pair_over_limit(med_db, doses, max_dose_db, a, b):
+    """두 약품을 하루 최대 복용했을 때 어떤 성분이든 최대량을 넘는지"""
+    ing_a, ing_b = med_db[a].ingredients, med_db[b].ingredients
+    for ing in ing_a.keys() & ing_b.keys():
+        limit = max_dose_db.get(ing)
+        if limit and ing_a[ing] * doses[a] + ing_b[ing] * doses[b] > limit:
+            return True
+    return False
+
+
+def build_conflict_graph(med_db, max_dose_db=MAX_DOSE_DB, per_product=MAX_CONFLICTS_PER_PRODUCT):
+    """
+    초과 조합 그래프를 계산합니다.
+    반환값: {약품명: [{"with": [약품명...], "kind": "over_limit", "ingredients": [...], "ratio": 합계/최대량}]}
+    약품마다 2개 조합을 먼저, 같은 크기에서는 초과 비율이 큰 순으로 최대 per_product개입니다.
+    """
+    index = ingredient_index(med_db)
+    doses = {name: daily_dose_count(med) for name, med in med_db.items()}
+
+    # 약품명 → {조합: [관련 성분 집합, 최대 초과 비율]}
+    found = defaultdict(dict)
+    for ing, limit in max_dose_db.items():
+        names = index.get(ing, [])
+        if not limit or len(names) < 2:
+            continue
+        amounts = _daily_amounts(med_db, names, ing, doses)
+        for name, combo, total in _over_limit_candidates(names, amounts, limit, per_product):
+            entry = found[name].setdefault(combo, [set(), 0.0])
+            entry[0].add(ing)
+            entry[1] = max(entry[1], float(total / limit))
+
+    graph = {name: [] for name in med_db}
+    for name, combos in found.items():
+        items = []
+        for combo, (ings, ratio) in combos.items():
+            # 다른 성분 기준으로 이미 초과하는 2개 조합을 포함하는 3개 조합은 제외
+            if len(combo) == 3 and any(
+                _pair_over_limit(med_db, doses, max_dose_db, a, b)
+                for a, b in ((combo[0], combo[1]), (combo[0], combo[2]), (combo[1], combo[2]))
+            ):
+                continue
+            items.append((len(combo), -ratio, combo, ings))
+        items.sort(key=lambda item: item[:3])
+        graph[name] = [
+            {
+                "with": list(combo[1:]),
+                "kind": "over_limit",
+                "ingredients": sorted(ings),
+                "ratio": round(-neg_ratio, 3),
+            }
+            for _, neg_ratio, combo, ings in items[:per_product]
+        ]
+    return graph
+
+
+def conflicts_for(catalog, name, limit=MAX_CONFLICTS_PER_PRODUCT):
+    """
+    name과 함께 복용할 때 주의할 조합 목록과 표시하지 못한 성분 중복 약품 수를 반환합니다.
+    성분 중복은 역색인에서 바로 구해 공유 성분이 많은 약품부터 limit개,
+    초과 조합은 미리 계산된 충돌 그래프를 사용합니다.
+    """
+    med = catalog.med_db[name]
+    shared = defaultdict(list)  # 다른 약품 → 공유 성분
+    for ing in med.ingredients:
+        for other in catalog.ingredient_index.get(ing, ()):
+            if other != name:
+                shared[other].append(ing)
+    ranked = sorted(shared, key=lambda other: (-len(shared[other]), catalog.order[other]))
+    duplicates = [
+        {"with": [other], "kind": "duplicate", "ingredients": sorted(shared[other])}
+        for other in ranked[:limit]
+    ]
+    return duplicates + list(catalog.conflict_graph.get(name, [])), max(len(ranked) - limit, 0)
+
+
+def save_conflict_graph(graph, path=CONFLICT_GRAPH_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(graph, f, ensure_ascii=False, indent=1)
+
+
+def load_conflict_graph(path=CONFLICT_GRAPH_PATH):
+    """저장된 충돌 그래프를 읽습니다. 파일이 없으면 빈 그래프를 반환합니다."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OTCure 카탈로그 충돌 그래프 생성")
+    parser.add_argument("--output", default=CONFLICT_GRAPH_PATH)
+    args = parser.parse_args()
+
+    graph = build_conflict_graph(MED_DB)
+    save_conflict_graph(graph, args.output)
+    edge_count = sum(len(items) for items in graph.values())
+    print(f"{len(graph)}개 약품, {edge_count}개 초과 조합 -> {args.output}")
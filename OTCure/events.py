@@ -0,0 +1,125 @@
+"""
+경고/중복 성분/저장 거부 이벤트 기록 (샘플링, 비차단, 배치 기록).
+
+어떤 규칙이 자주 걸리는지, 어떤 약품 때문에 저장이 거부되는지 집계할 수 있도록
+화면에 한 번 표시되고 사라지던 판정 결과를 구조화된 이벤트로 JSONL 파일에 남깁니다.
+
+    {"ts": ..., "event": "rule_triggered", "session": ..., "catalog_version": ..., "sample_rate": 1.0,
+     "rule": "Multiple_Antihistamine", "level": "error", "products": [...]}
+
+- emit()은 샘플링 후 제한된 크기의 큐에 넣기만 하며 기다리지 않습니다.
+  큐가 가득 차면 이벤트를 버리고 개수만 세어 다음 배치에 "events_dropped" 이벤트로 남깁니다.
+- 백그라운드 스레드가 모아서(write_behind.run_batches) 한 번에 쓰며, 분석용 기록이므로
+  fsync는 하지 않고 쓰기에 실패한 배치는 버립니다.
+- 파일이 EVENT_MAX_BYTES를 넘으면 events.jsonl → events.jsonl.1 → ... 순으로 회전합니다.
+- 집계 시에는 sample_rate로 나눠 전체 건수를 추정합니다.
+
+OTCURE_EVENT_LOG 환경변수로 파일 경로를 지정하면 활성화됩니다.
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+from write_behind import STOP, run_batches
+
+EVENT_LOG_PATH = os.environ.get("OTCURE_EVENT_LOG")
+# 이벤트를 남길 비율 (0~1)
+EVENT_SAMPLE_RATE = float(os.environ.get("OTCURE_EVENT_SAMPLE_RATE", 1.0))
+# 회전 기준 파일 크기 (바이트)와 보관할 이전 파일 수
+EVENT_MAX_BYTES = 50 * 1024 * 1024
+EVENT_BACKUP_COUNT = 5
+# 큐에 쌓아둘 수 있는 최대 이벤트 수
+EVENT_QUEUE_SIZE = 10000
+# 한 번에 기록할 최대 건수와, 배치를 모으기 위해 더 기다리는 시간 (초)
+EVENT_BATCH_SIZE = 500
+EVENT_BATCH_WAIT = 0.5
+
+
+class EventSink:
+    def __init__(self, path, sample_rate=EVENT_SAMPLE_RATE, max_bytes=EVENT_MAX_BYTES,
+                 backup_count=EVENT_BACKUP_COUNT, queue_size=EVENT_QUEUE_SIZE,
+                 batch_size=EVENT_BATCH_SIZE, batch_wait=EVENT_BATCH_WAIT):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.dropped = 0  # 큐가 가득 차 버린 이벤트 수 (다음 배치에 기록한 뒤 0으로)
+        self._dropped_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="event-sink", daemon=True)
+        self._thread.start()
+
+    def emit(self, event, **fields):
+        """이벤트 한 건을 (샘플링되면) 큐에 넣습니다. 파일 I/O나 큐 자리를 기다리지 않습니다."""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        record = {"ts": time.time(), "event": event, "sample_rate": self.sample_rate}
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.1")
+
+    def _write_batch(self, batch):
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            batch = batch + [{"ts": time.time(), "event": "events_dropped", "count": dropped}]
+        if not batch:
+            return
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch).encode("utf-8")
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def _handle_batch(self, batch):
+        try:
+            self._write_batch(batch)
+        except OSError as e:
+            # 분석용 기록이므로 실패한 배치는 버리고 앱은 계속 동작합니다.
+            print(f"[events] write failed, dropping {len(batch)} events: {e!r}")
+
+    def _run(self):
+        run_batches(self._queue, self._handle_batch, self.batch_size, self.batch_wait)
+
+    def close(self):
+        """남은 이벤트를 모두 쓰고 백그라운드 스레드를 종료합니다."""
+        if self._thread.is_alive():
+            self._queue.put(STOP)
+            self._thread.join()
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_event_sink():
+    """OTCURE_EVENT_LOG가 설정된 경우 프로세스 공용 EventSink, 아니면 None"""
+    global _sink
+    if not EVENT_LOG_PATH:
+        return None
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = EventSink(EVENT_LOG_PATH)
+                atexit.register(_sink.close)
+    return _sink
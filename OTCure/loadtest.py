@@ -0,0 +1,99 @@
+"""
+server.py 로컬 부하 테스트 스크립트.
+
+실행 (서버를 먼저 띄운 뒤):
+    python loadtest.py --url http://127.0.0.1:8600 --clients 32 --duration 10
+
+각 클라이언트 스레드가 keep-alive 연결 하나로 /check, /check-log, /eligible 요청을
+섞어 보내고, 처리량(req/s)과 지연시간 백분위(p50/p90/p99)를 출력합니다.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import quote, urlparse
+
+from med_db import MED_DB, SORTED_INGREDIENTS
+
+
+def make_request(rng, names):
+    """무작위 요청 하나를 (method, path, body) 형태로 만듭니다."""
+    kind = rng.random()
+    if kind < 0.5:
+        body = {"products": rng.sample(names, rng.randint(1, 4))}
+        return "POST", "/check", body
+    if kind < 0.8:
+        body = {
+            "products": rng.sample(names, rng.randint(1, 3)),
+            "log": [{"products": rng.sample(names, rng.randint(1, 3))} for _ in range(rng.randint(0, 4))],
+        }
+        return "POST", "/check-log", body
+    exclude = ",".join(rng.sample(SORTED_INGREDIENTS, rng.randint(0, 3)))
+    path = f"/eligible?pregnant={rng.randint(0, 1)}&elderly={rng.randint(0, 1)}&exclude={quote(exclude)}"
+    return "GET", path, None
+
+
+def client_loop(host, port, deadline, seed, latencies, errors):
+    rng = random.Random(seed)
+    names = list(MED_DB.keys())
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    while time.perf_counter() < deadline:
+        method, path, body = make_request(rng, names)
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=data, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(resp.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(repr(e))
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OTCure 안전성 검사 서비스 부하 테스트")
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="측정 시간(초)")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    deadline = time.perf_counter() + args.duration
+    latencies, errors = [], []
+
+    threads = [
+        threading.Thread(target=client_loop, args=(url.hostname, url.port or 80, deadline, i, latencies, errors))
+        for i in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"clients={args.clients} duration={elapsed:.1f}s requests={len(latencies)} errors={len(errors)}")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    for pct in (50, 90, 99):
+        print(f"p{pct}: {percentile(latencies, pct) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+napp.py 다중 세션 부하 테스트 하네스 (서버 용량 산정용).
+
+streamlit.testing.v1.AppTest로 사용자 N명의 세션을 동시에 띄워 두고,
+각 세션의 rerun을 라운드 로빈으로 번갈아 실행합니다. (AppTest는 프로세스 전역 런타임을
+사용하므로 스레드 병렬 실행이 불가능합니다. 결과는 Streamlit 서버 프로세스 하나의 부하에 해당합니다.)
+각 사용자는 아래 스크립트 흐름을 그대로 따라갑니다.
+  1. 프로필 입력 후 저장
+  2. 약품 체크 → 제외 성분 탭 조작 → 복용 기록 저장(on_log_save)을 --log-length 회 반복
+
+사용자 수와 기록 길이별로 rerun 지연시간 백분위(p50/p90/p99), 처리량(rerun/s),
+세션당 메모리 증가량을 출력합니다. 메모리는 기본적으로 시나리오 전후 현재 RSS(/proc/self/statm)의
+차이이며, 측정 전마다 gc.collect()로 이전 시나리오의 세션을 정리합니다.
+--trace-memory를 주거나 /proc이 없는 환경에서는 tracemalloc으로 측정합니다(대신 지연시간이 크게 늘어납니다).
+
+실행:
+    python loadtest_app.py --users 1,5,10,20 --log-length 5,20
+"""
+import argparse
+import gc
+import os
+import random
+import time
+import tracemalloc
+
+from streamlit.testing.v1 import AppTest
+
+from med_db import MED_DB, SORTED_INGREDIENTS
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "napp.py")
+
+
+class SessionTrace:
+    """사용자 한 명의 스크립트 흐름과 rerun 지연시간 기록"""
+
+    def __init__(self, user_id, log_length, seed):
+        self.user_id = user_id
+        self.log_length = log_length
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.errors = []
+        self.at = AppTest.from_file(APP_PATH, default_timeout=60)
+
+    def _run(self):
+        start = time.perf_counter()
+        self.at.run()
+        self.latencies.append(time.perf_counter() - start)
+        if self.at.exception:
+            self.errors.append(self.at.exception[0].value)
+
+    def steps(self):
+        """rerun 한 번마다 yield하는 제너레이터 (라운드 로빈 스케줄링용)"""
+        # 1. 프로필 입력 및 저장
+        self._run()
+        yield
+        self.at.text_input(key="input_name").input(f"user{self.user_id}")
+        self.at.number_input(key="input_age").set_value(self.rng.randint(20, 80))
+        self.at.selectbox(key="input_gender").select(self.rng.choice(["남성", "여성"]))
+        self._run()
+        yield
+        self.at.button[0].click()  # 프로필 저장 (form submit)
+        self._run()
+        yield
+
+        for _ in range(self.log_length):
+            # 2. 약품 선택 (비활성화되지 않은 항목 중 1~3개)
+            enabled = [cb.key for cb in self.at.checkbox if not cb.disabled]
+            for key in self.rng.sample(enabled, min(len(enabled), self.rng.randint(1, 3))):
+                self.at.checkbox(key=key).check()
+                self._run()
+                yield
+
+            # 3. 제외 성분 탭 조작 (가끔 성분을 추가/해제)
+            if self.rng.random() < 0.3:
+                excluded = self.rng.sample(SORTED_INGREDIENTS, self.rng.randint(0, 2))
+                self.at.multiselect(key="exclude_multiselect").set_value(excluded)
+                self._run()
+                yield
+
+            # 4. 복용 기록 저장 (on_log_save 콜백)
+            save_buttons = [b for b in self.at.button if "복용 기록 저장" in str(b.label)]
+            if save_buttons:
+                save_buttons[0].click()
+                self._run()
+                yield
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+STATM_PATH = "/proc/self/statm"
+
+
+def _current_rss_bytes():
+    """현재 RSS (최대치가 아니라 지금 상주 중인 메모리)"""
+    gc.collect()
+    with open(STATM_PATH) as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def run_scenario(users, log_length, seed, trace_memory=False):
+    """users명의 세션을 라운드 로빈으로 실행하고 결과 요약을 반환합니다."""
+    trace_memory = trace_memory or not os.path.exists(STATM_PATH)
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        base_memory = tracemalloc.get_traced_memory()[0]
+    else:
+        base_memory = _current_rss_bytes()
+
+    traces = [SessionTrace(i, log_length, seed + i) for i in range(users)]
+    active = [(trace, trace.steps()) for trace in traces]
+    started = time.perf_counter()
+    while active:
+        still_active = []
+        for trace, steps in active:
+            try:
+                next(steps)
+                still_active.append((trace, steps))
+            except StopIteration:
+                pass
+            except Exception as e:  # 하네스가 멈추지 않도록 세션 단위로 기록만 합니다.
+                trace.errors.append(repr(e))
+        active = still_active
+    elapsed = time.perf_counter() - started
+
+    # 세션(AppTest)이 살아있는 상태에서 측정해야 세션 상태 메모리가 포함됩니다.
+    if trace_memory:
+        gc.collect()
+        memory = tracemalloc.get_traced_memory()[0] - base_memory
+        tracemalloc.stop()
+    else:
+        memory = _current_rss_bytes() - base_memory
+
+    latencies = sorted(lat for trace in traces for lat in trace.latencies)
+    return {
+        "users": users,
+        "log_length": log_length,
+        "reruns": len(latencies),
+        "errors": sum(len(trace.errors) for trace in traces),
+        "saved_logs": sum(len(trace.at.session_state["medication_log"]) for trace in traces
+                          if "medication_log" in trace.at.session_state),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "memory_per_session": memory / users,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OTCure Streamlit 다중 세션 부하 테스트")
+    parser.add_argument("--users", default="1,5,10", help="동시 사용자 수 목록 (쉼표 구분)")
+    parser.add_argument("--log-length", default="5", help="사용자당 복용 기록 저장 횟수 목록 (쉼표 구분)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc으로 세션당 메모리 측정")
+    args = parser.parse_args()
+
+    # 첫 실행의 import/컴파일 비용이 측정에 섞이지 않도록 한 세션을 먼저 돌립니다.
+    run_scenario(1, 1, args.seed)
+
+    print(f"catalog: {len(MED_DB)} products")
+    print(f"{'users':>5} {'logs':>5} {'reruns':>7} {'errors':>6} {'saved':>6} "
+          f"{'rerun/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'KiB/session':>12}")
+    for log_length in [int(v) for v in args.log_length.split(",")]:
+        for users in [int(v) for v in args.users.split(",")]:
+            r = run_scenario(users, log_length, args.seed, args.trace_memory)
+            print(f"{r['users']:>5} {r['log_length']:>5} {r['reruns']:>7} {r['errors']:>6} {r['saved_logs']:>6} "
+                  f"{r['throughput']:>8.1f} {r['p50'] * 1000:>8.1f} {r['p90'] * 1000:>8.1f} "
+                  f"{r['p99'] * 1000:>8.1f} {r['memory_per_session'] / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+복용 기록(medication_log) 보존 정책.
+
+최근 LOG_RETENTION_DAYS일은 항목 그대로 유지하고, 그보다 오래된 날짜는
+날짜별 성분 합계만 담은 압축 항목 하나로 합칩니다. 전체(압축되지 않은) 항목 수가
+LOG_MAX_ENTRIES를 넘으면 오늘을 제외한 가장 오래된 날짜부터 추가로 압축합니다.
+압축 전 원본 항목은 선택적으로 JSONL 파일(콜드 스토리지)에 보관할 수 있습니다.
+
+압축 항목 형식:
+    {"date": "YYYY-MM-DD", "compacted": True, "count": 항목 수,
+     "ingredients": {성분: 합계(mg)}}
+"""
+import json
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+
+from safety import entry_ingredients
+
+
+def _env_int(name, default, minimum):
+    """정수 환경변수를 읽습니다. minimum보다 작으면 잘못된 설정이므로 ValueError를 냅니다."""
+    value = int(os.environ.get(name, default))
+    if value < minimum:
+        raise ValueError(f"{name}는 {minimum} 이상이어야 합니다 (현재 {value})")
+    return value
+
+
+# 항목을 그대로 유지할 최근 일수 (오늘 포함). 0 이하면 오늘 항목까지 압축되므로 1 이상만 허용합니다.
+LOG_RETENTION_DAYS = _env_int("OTCURE_LOG_RETENTION_DAYS", 7, minimum=1)
+# 압축되지 않은 항목의 최대 개수 (오늘 항목은 이 값과 관계없이 유지)
+LOG_MAX_ENTRIES = _env_int("OTCURE_LOG_MAX_ENTRIES", 200, minimum=0)
+# 압축 전 원본 항목을 보관할 JSONL 파일 경로 (없으면 보관하지 않음)
+LOG_ARCHIVE_PATH = os.environ.get("OTCURE_LOG_ARCHIVE")
+
+
+def serialize_entry(entry):
+    """Medication 객체 대신 약품명을 담은 JSON 직렬화 가능한 항목으로 변환합니다."""
+    if entry.get("compacted"):
+        return dict(entry)
+    return {
+        "date": entry["date"],
+        "time": entry.get("time"),
+        "description": entry.get("description"),
+        "medications": [med.name for med in entry["medications"]],
+    }
+
+
+def archive_entries(entries, path, owner=None):
+    """원본 항목을 JSONL 파일 끝에 추가합니다."""
+    with open(path, "a", encoding="utf-8") as f:
+        for entry in entries:
+            record = serialize_entry(entry)
+            if owner is not None:
+                record["owner"] = owner
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def days_to_compact(log, today, keep_days=LOG_RETENTION_DAYS, max_entries=LOG_MAX_ENTRIES):
+    """보존 기간과 개수 제한에 따라 압축할 날짜 집합을 계산합니다."""
+    cutoff = (date.fromisoformat(today) - timedelta(days=keep_days - 1)).strftime("%Y-%m-%d")
+
+    full_counts = defaultdict(int)
+    for entry in log:
+        if not entry.get("compacted"):
+            full_counts[entry["date"]] += 1
+
+    # 1. 기간 기준: cutoff 이전 날짜는 모두 압축
+    days = {day for day in full_counts if day < cutoff}
+
+    # 2. 개수 기준: 남은 항목이 max_entries 이하가 될 때까지 오래된 날짜부터 압축
+    remaining = sum(count for day, count in full_counts.items() if day not in days)
+    for day in sorted(full_counts):
+        if remaining <= max_entries:
+            break
+        if day in days or day == today:
+            continue
+        days.add(day)
+        remaining -= full_counts[day]
+
+    return days
+
+
+def compact_log(log, today, keep_days=LOG_RETENTION_DAYS, max_entries=LOG_MAX_ENTRIES,
+                archive_path=LOG_ARCHIVE_PATH, owner=None):
+    """
+    보존 정책을 적용한 새 기록 리스트를 반환합니다.
+    압축할 날짜가 없으면 전달받은 log를 그대로 반환합니다.
+    """
+    days = days_to_compact(log, today, keep_days, max_entries)
+    if not days:
+        return log
+
+    compacted = {}
+    archived = []
+    kept = []
+    for entry in log:
+        if entry["date"] not in days:
+            kept.append(entry)
+            continue
+
+        record = compacted.setdefault(entry["date"], {
+            "date": entry["date"],
+            "compacted": True,
+            "count": 0,
+            "ingredients": defaultdict(float),
+        })
+        for ing, amount in entry_ingredients(entry):
+            record["ingredients"][ing] += amount
+        if entry.get("compacted"):
+            record["count"] += entry["count"]
+        else:
+            record["count"] += 1
+            archived.append(entry)
+
+    if archive_path and archived:
+        archive_entries(archived, archive_path, owner)
+
+    for record in compacted.values():
+        record["ingredients"] = dict(record["ingredients"])
+
+    # 날짜순 정렬 (같은 날짜 안에서는 기존 순서 유지)
+    return sorted(list(compacted.values()) + kept, key=lambda entry: entry["date"])
@@ -0,0 +1,165 @@
+"""
+복용 기록 영구 저장 (write-behind, 배치 커밋).
+
+on_log_save 콜백은 기록을 제한된 크기의 큐에 넣기만 하고 바로 반환합니다.
+백그라운드 스레드가 큐에서 여러 건을 모아(write_behind.run_batches) JSONL 파일에 한 번에 쓰고
+flush/fsync를 한 번만 수행합니다(group commit). 쓰기에 실패한 배치는 다음 배치와 함께 다시 시도하되,
+재시도 대기 기록은 LOG_RETRY_LIMIT건까지만 두고 넘치는 기록은 버리고 overflowed로 셉니다.
+
+- 호출한 스레드에서는 파일 I/O도, 큐 자리를 기다리는 일도 하지 않습니다. 큐가 가득 차면
+  (백그라운드 스레드가 디스크를 따라가지 못하면) 그 기록은 파일에 남기지 않고 overflowed만 센 뒤
+  False를 반환하며, 호출한 쪽이 세션에만 저장되었음을 알립니다.
+- 프로세스 종료 시(atexit) 남은 기록을 모두 기록합니다. flush()/close()는 끝내 쓰지 못한 기록 수를
+  반환하고, close()는 그런 기록이 있으면 출력으로 남깁니다.
+- 저장하는 세션은 자신의 st.session_state['medication_log']를 그대로 사용하므로
+  저장 지연과 관계없이 방금 저장한 기록을 바로 봅니다. 파일에서 다시 읽을 때도
+  read()가 아직 쓰이지 않은 기록을 함께 돌려줍니다.
+
+OTCURE_LOG_STORE 환경변수로 파일 경로를 지정하면 활성화됩니다.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+from collections import defaultdict
+
+from log_retention import serialize_entry
+from write_behind import STOP, run_batches
+
+LOG_STORE_PATH = os.environ.get("OTCURE_LOG_STORE")
+# 큐에 쌓아둘 수 있는 최대 기록 수
+LOG_QUEUE_SIZE = 10000
+# 한 번에 기록할 최대 건수
+LOG_BATCH_SIZE = 500
+# 첫 건을 받은 뒤 같은 배치로 묶기 위해 더 기다리는 시간 (초)
+LOG_BATCH_WAIT = 0.05
+# 쓰기에 실패해 다시 시도할 기록을 보관할 최대 건수 (디스크 장애가 길어져도 메모리가 일정)
+LOG_RETRY_LIMIT = LOG_QUEUE_SIZE
+
+
+class LogWriter:
+    def __init__(self, path, batch_size=LOG_BATCH_SIZE, batch_wait=LOG_BATCH_WAIT,
+                 queue_size=LOG_QUEUE_SIZE, retry_limit=LOG_RETRY_LIMIT):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.retry_limit = retry_limit
+        self.overflowed = 0  # 큐나 재시도 대기가 가득 차 파일에 남기지 못한 기록 수 (_pending_lock)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending = defaultdict(list)  # owner → 아직 파일에 쓰이지 않은 레코드
+        self._failed = []  # 쓰기에 실패해 다음 배치와 함께 다시 시도할 기록 (백그라운드 스레드 전용)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, owner, entry):
+        """
+        기록 한 건을 저장 큐에 넣고 True를 반환합니다. 파일 I/O나 큐 자리를 기다리지 않으며,
+        큐가 가득 차 있으면 기록을 버리고 False를 반환합니다.
+        """
+        record = serialize_entry(entry)
+        record["owner"] = owner
+        with self._pending_lock:
+            self._pending[owner].append(record)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._pending_lock:
+                self._discard_pending([record])
+                self.overflowed += 1
+            return False
+        return True
+
+    def read(self, owner):
+        """owner의 저장된 기록(직렬화 형식)을 아직 쓰이지 않은 것까지 포함해 반환합니다."""
+        with self._file_lock:
+            records = []
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        record = json.loads(line)
+                        if record.get("owner") == owner:
+                            records.append(record)
+            with self._pending_lock:
+                pending = list(self._pending.get(owner, ()))
+        return records + pending
+
+    def _write_batch(self, batch):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+        with self._file_lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._pending_lock:
+                self._discard_pending(batch)
+
+    def _discard_pending(self, records):
+        # self._pending_lock을 잡은 상태에서 호출됩니다.
+        for record in records:
+            pending = self._pending.get(record["owner"])
+            if pending:
+                pending.remove(record)
+                if not pending:
+                    del self._pending[record["owner"]]
+
+    def _handle_batch(self, batch):
+        batch = self._failed + batch
+        if not batch:
+            return
+        try:
+            self._write_batch(batch)
+            self._failed = []
+        except OSError as e:
+            # 오래된 기록부터 retry_limit건만 다시 시도하고 나머지는 버립니다.
+            self._failed, dropped = batch[:self.retry_limit], batch[self.retry_limit:]
+            if dropped:
+                with self._pending_lock:
+                    self._discard_pending(dropped)
+                    self.overflowed += len(dropped)
+            print(f"[log_store] write failed, retrying {len(self._failed)} records with the next batch "
+                  f"(dropped {len(dropped)}): {e!r}")
+
+    def _run(self):
+        run_batches(self._queue, self._handle_batch, self.batch_size, self.batch_wait)
+
+    def flush(self):
+        """
+        큐에 들어간 기록을 모두 처리할 때까지 기다리고, 쓰기에 실패해 아직 파일에 없는
+        (다음 배치에서 다시 시도할) 기록 수를 반환합니다. 0이면 모두 쓰였습니다.
+        """
+        self._queue.join()
+        return len(self._failed)
+
+    def close(self):
+        """
+        남은 기록을 모두 쓰고 백그라운드 스레드를 종료합니다.
+        끝내 쓰지 못한 기록 수를 반환하며, 버린 기록(overflowed)과 함께 출력으로 남깁니다.
+        """
+        if self._thread.is_alive():
+            self._queue.put(STOP)
+            self._thread.join()
+        unwritten = len(self._failed)
+        if unwritten or self.overflowed:
+            print(f"[log_store] closed with {unwritten} unwritten records "
+                  f"({self.overflowed} dropped earlier) for {self.path}")
+        return unwritten
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """OTCURE_LOG_STORE가 설정된 경우 프로세스 공용 LogWriter, 아니면 None"""
+    global _writer
+    if not LOG_STORE_PATH:
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogWriter(LOG_STORE_PATH)
+                atexit.register(_writer.close)
+    return _writer
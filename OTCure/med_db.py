@@ -0,0 +1,491 @@
+"""
+OTCure 의약품 데이터베이스와 경고 규칙.
+
+Streamlit 앱(napp.py)과 HTTP 서비스(server.py)가 함께 사용합니다.
+OTCURE_CATALOG 환경변수에 build_catalog.py로 만든 카탈로그 파일 경로를 지정하면
+아래 MED_DB 대신 해당 파일의 약품 목록을 사용합니다.
+"""
+import json
+import os
+
+# 1. 성분별 일일 최대 복용량 데이터베이스 추가 (mg)
+MAX_DOSE_DB = {
+    "아세트아미노펜": 4000, 
+    "이부프로펜": 3200,          
+    "나프록센": 1250,
+    "덱시부프로펜": 1200
+}
+
+# 1. 의약품 정보를 관리하는 클래스 정의
+class Medication:
+    """
+    약품의 분류 정보(class_type)와 작용 그룹(effect_group)을 포함하는 클래스
+    """
+    def __init__(self, name, description, usage, ingredients, class_type, preg, age, url):
+        self.name = name
+        self.description = description
+        self.usage = usage
+        self.ingredients = ingredients
+        self.class_type = class_type  # 예: "진통제", "감기약", "소화제"
+        self.preg = preg # 0: 해당없음, 1: 임부 금기, 2: 임부 주의
+        self.age = age # 0: 해당없음, 1: 연령주의
+        self.url = url
+
+# 2. 약품 데이터베이스
+MED_DB = {
+    "타이레놀500mg": Medication(
+        name="타이레놀500mg",
+        description="해열 및 진통 효과가 있는 약품입니다.",
+        usage="만 12세 이상 소아 및 성인: 1회 1-2정 (4-6시간 간격), 1일 최대 8정",
+        ingredients={
+            '아세트아미노펜': 500
+            },
+        class_type="해열진통제",
+        preg = 0,
+        age = 0,
+        url = "https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2021082400002"
+    ),
+    "타이레놀콜드에스정": Medication(
+        name="타이레놀콜드에스정",
+        description="종합 감기약 (콧물, 코막힘, 재채기, 두통, 발열 등)",
+        usage="성인 기준 1회 1정, 1일 3회 식후 30분",
+        ingredients={
+            '아세트아미노펜': 325, 
+            '슈도에페드린염산염': 30, 
+            '클로르페니라민말레산염': 2,
+            '덱스트로메토르판브롬화수소산염수화물': 15
+        },
+        class_type="감기약",
+        preg = 2, 
+        age = 0,
+        url = "https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2021101800010"
+    ),
+    "타이레놀8시간이알서방정": Medication(
+        name="타이레놀8시간이알서방정",
+        description="해열 및 진통 작용을 하는 서방형 아세트아미노펜 제제로, 통증이 오래 지속될 때 사용됩니다.",
+        usage="성인 기준 아세트아미노펜으로서 1회 650mg 복용(서방정 1정 기준)이며, 1일 최대 복용량을 초과하지 않도록 주의하세요.",
+        ingredients={'아세트아미노펜': 650},
+        class_type="해열진통제", 
+        preg = 0,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2022020300026"
+    ),
+    "게보린정": Medication(
+        name="게보린정",
+        description="해열 및 진통 작용을 가진 복합 진통제입니다. 두통, 발열, 신경통, 근육통 등에 사용됩니다.",
+        usage="성인 기준 1회 1정, 필요 시 4시간 이상 간격을 두고 복용. 공복을 피해 복용.",
+        ingredients={
+            '아세트아미노펜': 300, 
+            '이소프로필안티피린': 150, 
+            '카페인무수물': 50
+        },  
+        class_type="해열진통제",
+        preg = 2,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11A1270A0060"
+    ),
+    "챔프시럽": Medication(
+        name = "챔프시럽",
+        description = "어린이용 해열진통제. 감기나 발열, 통증 시 해열 목적으로 사용됩니다.",
+        usage = "체중 1kg당 10~15mg 기준으로 4~6시간 간격 복용 (1일 5회 이하)",
+        ingredients = {
+            "아세트아미노펜": 160  # per 5mL
+        },
+        class_type = "해열진통제",
+        preg = 0,
+        age = 0,
+        url = "https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2012091000002"
+    ),
+    "콜대원콜드큐시럽": Medication(
+        name="콜대원콜드큐시럽",
+        description="감기의 제증상(콧물, 코막힘, 재채기, 인후통, 기침, 가래, 오한, 발열, 두통, 관절통, 근육통) 완화를 위한 종합감기약 시럽제입니다.",
+        usage="성인 및 만 15세 이상: 1회 1포(20 mL), 1일 3회 식후 30분 복용. 복용간격은 최소 4시간 이상.",
+        ingredients={
+            '아세트아미노펜': 325,     # mg per 1포20mL 
+            '카페인무수물': 25,      
+            '덱스트로메토르판브롬화수소산염수화물': 16, 
+            'DL‑메틸에페드린염산염': 21, 
+            '구아이페네신': 83,      
+            '클로르페니라민말레산염': 2.5
+        },
+        class_type="감기약",
+        preg = 0,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2021070200002"
+    ),
+    "콜대원노즈큐에스시럽": Medication(
+        name="콜대원 노즈큐에스시럽",
+        description="콧물, 코막힘, 재채기 등의 증상을 중심으로 한 코감기 증상 완화를 위한 일반의약품 시럽제입니다.",
+        usage="1회 1포 1일 3회 식후 복용",
+        ingredients={
+            '아세트아미노펜': 325,   
+            '카페인무수물': 25,   
+            '클로르페니라민말레산염': 2.5,
+            '구아이페네신': 42,
+            '슈도에페드린염산염': 30
+        },  
+        class_type="감기약",
+        preg = 2,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2023101900005"
+    ),
+    "콜대원코프큐시럽": Medication(
+        name = "콜대원코프큐시럽",
+        description = "기침, 가래, 발열, 두통 등 감기 증상을 완화하는 종합 감기약입니다.",
+        usage = "성인 기준 1회 20mL, 1일 3회 식후 복용",
+        ingredients = {
+            "아세트아미노펜": 325,
+            "덱스트로메토르판브롬화수소산염": 16,
+            "DL-메틸에페드린염산염": 21,
+            "구아이페네신": 83,
+            "카페인무수물": 25
+        },
+        class_type = "감기약",
+        preg = 0,
+        age = 0,
+        url = "https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2021061700005"
+    ),
+    "판콜에스내복액": Medication(
+        name="판콜에스내복액",
+        description="감기로 인한 여러 증상(콧물, 코막힘, 재채기, 기침, 가래, 두통, 발열 등)을 완화하는 종합감기약입니다.",
+        usage="성인 기준 1회 30mL(1병), 1일 3회 식후 복용",
+        ingredients={
+            '아세트아미노펜': 300,
+            'DL‑메틸에페드린염산염': 17.5,
+            '클로르페니라민말레산염': 2.5,
+            '카페인무수물': 30,
+            '구아이페네신': 83.3
+        },
+        class_type="감기약",
+        preg = 0,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11A0570A0353"
+    ),
+    "판피린큐액": Medication(
+        name="판피린큐액",
+        description="감기의 여러 증상(콧물, 코막힘, 재채기, 인후통, 기침, 가래, 오한, 발열, 관절통, 두통, 근육통)을 완화하는 종합감기약입니다.",
+        usage="성인 1회 20mL, 1일 3회 식후 30분 복용.",
+        ingredients={
+            '아세트아미노펜': 300,   
+            'DL-메틸에페드린염산염': 18,  
+            '구아이페네신': 42,  
+            '티페피딘시트르산염': 10,  
+            '카페인무수물': 30,  
+            '클로르페니라민말레산염': 2.5  
+        },
+        class_type="감기약",
+        preg = 0, # 임부 주의
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11AKP08F0397"
+    ),
+    "모드콜에스연질캡슐": Medication(
+        name="모드콜에스연질캡슐",
+        description="감기의 여러 증상(콧물, 코막힘, 기침, 가래, 발열, 두통, 근육통 등)을 완화하는 복합감기약입니다.",
+        usage="성인 및 만 15세 이상: 1회 2캡슐, 1일 3회 식후 30분 복용. 만 8세 이상~만 15세 미만: 1회 1캡슐, 1일 3회 식후 30분 복용.",
+        ingredients={
+            '아세트아미노펜': 200,  
+            '클로르페니라민말레산염': 1.25, 
+            '덱스트로메토르판브롬화수소산염': 8, 
+            'DL-메틸에페드린염산염': 12.5,  
+            '구아이페네신': 41.6, 
+            '슈도에페드린염산염': 15 
+        },
+        class_type="감기약",
+        preg = 2,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2012050900002"
+    ),
+    "부루펜정200mg": Medication(
+        name="부루펜정200mg",
+        description="해열, 진통 및 소염 작용을 하는 비스테로이드성 소염진통제입니다.",
+        usage="성인 기준 1회 1-2정 (200-400mg), 1일 3-4회",
+        ingredients={
+            '이부프로펜': 200
+        },
+        class_type="소염진통제",
+        preg = 2,
+        age = 1, 
+        url = "https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11A0500A0097"
+    ),
+    "탁센연질캡슐": Medication(
+        name="탁센연질캡슐",
+        description="진통·소염 작용을 하는 일반의약품으로, 두통·근육통·생리통 등 통증 완화에 사용됩니다.",
+        usage="성인 기준 1회 1정, 필요 시 1일 여러 회 복용 가능하나 복용간격 등은 약사 상담 필수.",
+        ingredients={
+            '나프록센': 250
+            },  
+        class_type="소염진통제",
+        preg = 2, 
+        age = 1,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=4mmn5udgx7cjw"
+    ),
+    "탁센레이디연질캡슐": Medication(
+        name="탁센레이디연질캡슐",
+        description="생리통을 포함한 각종 통증 및 발열, 붓기, 속쓰림 증상을 완화하도록 고안된 일반의약품 소염진통제 복합제입니다.",
+        usage="만 15세 이상 및 성인: 1일 1~3회, 1회 1~2캡슐. 단, 공복 복용을 피해야 함.",
+        ingredients={
+            '이부프로펜': 200,
+            '파마브롬': 25, 
+            '산화마그네슘': 83 
+        },
+        class_type="소염진통제",
+        preg = 2,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2021110500006"
+    ),
+    "이지엔6프로연질캡슐": Medication(
+        name="이지엔6프로연질캡슐",
+        description="통증 및 염증, 발열을 수반하는 여러 질환(감염, 관절염 등)에 사용되는 진통·소염제입니다.",
+        usage="성인 기준 1회 300mg(덱시부프로펜 기준), 1일 2~4회 복용. 단, 1일 1,200mg을 초과하지 않아야 합니다.",
+        ingredients={'덱시부프로펜': 300}, 
+        class_type="소염진통제",
+        preg = 2,
+        age = 1,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11AOOOOO7737"
+    ),
+    "이지엔6이브연질캡슐": Medication(
+        name="이지엔6이브연질캡슐",
+        description="생리통·두통·치통·근육통 등에 사용되는 진통제입니다.",
+        usage="성인 및 만 15세 이상: 1회 1-2캡슐, 1일 1-3회 복용. 복용간격은 최소 4시간 이상. 공복을 피해서 복용.",
+        ingredients={
+            '이부프로펜': 200,
+            '파마브롬': 25
+        },
+        class_type="소염진통제",
+        preg = 2,
+        age = 1,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2013011800015"
+    ),
+    "지르텍정": Medication(
+        name="지르텍정",
+        description="알레르기성 비염, 피부염 등 알레르기 증상 완화에 사용됩니다.",
+        usage="성인 기준 1일 1회 1정(10mg) 취침 전 복용",
+        ingredients={
+            '세티리진염산염': 10
+        },
+        class_type="항히스타민제",
+        preg = 0, 
+        age = 0,
+        url = "https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11ABBBBB2527"
+    ),
+    "코메키나캡슐": Medication(
+        name="코메키나캡슐",
+        description="비염(코감기 포함), 부비강염 등에 의한 코막힘·콧물·재채기 등의 증상을 완화하는 복합 비염치료제입니다.",
+        usage="성인(15세 이상) 기준 1회 1캡슐, 1일 3회 식후 복용. 복용간격은 최소 4시간 이상.",
+        ingredients={
+            '벨라돈나총알칼로이드': 0.13, 
+            '슈도에페드린염산염': 25, 
+            '카페인무수물': 50,  
+            '메퀴타진': 1.33,  
+            '글리시리진산이칼륨': 20  
+        },
+        class_type="항히스타민제",
+        preg = 2,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2017072700010"
+    ),
+    "펙소페나딘정": Medication(
+        name="펙소페나딘정",
+        description="알레르기성 비염 또는 만성 특발 두드러기의 증상을 완화하는 항히스타민제입니다.",
+        usage="성인 및 12세 이상: 1일 1회 1정(180 mg 기준) 또는 제품 라벨 참조.",
+        ingredients={
+            "펙소페나딘염산염": 180
+        },
+        class_type="항히스타민제",
+        preg = 2,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11AOOOOO7731"
+    ),
+    "클라리틴정": Medication(
+        name="클라리틴정",
+        description="알레르기성 비염 및 만성 원인불명의 두드러기 증상을 완화하는 항히스타민제입니다.",
+        usage="성인 기준 1일 1정 식사와 관계없이 복용.",
+        ingredients={"로라타딘": 10},
+        class_type="항히스타민제",
+        preg = 2,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2009091800015"
+    ),
+    "훼스탈플러스정": Medication(
+        name="훼스탈플러스정",
+        description="소화 불량 증상(과식, 체함)을 완화하는 소화제입니다.",
+        usage="성인 기준 1회 1정, 1일 3회 식후 복용",
+        ingredients={
+            '판크레아틴': 315, 
+            '셀룰라제': 10, 
+            '우르소데옥시콜산': 10, 
+            '시메티콘': 30
+        },
+        class_type="소화제",
+        preg = 0,
+        age = 0,
+        url = "https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11A0740B0009"
+    ),
+    "베아제정": Medication(
+        name="베아제정",
+        description="소화불량, 식욕감퇴, 과식·체함, 위부팽만감 등을 완화하는 소화촉진제입니다.",
+        usage="성인 기준 1회 1정, 1일 3회 식후 복용. ",
+        ingredients={
+            "디아스타제·프로테아제·셀룰라제": 50,
+            "판셀라제": 30,
+            "판프로신": 20,
+            "우르소데옥시콜산": 10,
+            "리파제": 15,
+            "판크레아틴장용과립": 78.6,
+            "시메티콘": 40
+        },
+        class_type="소화제",
+        preg = 0,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11A0430A0267"
+    ),
+    "돌코락스에스장용정": Medication(
+        name="돌코락스‑에스장용정",
+        description="간헐성 변비 증상의 완화를 위한 자극성 완하제입니다. 밤사이 배변을 유도하는 작용이 있습니다.",
+        usage="성인 및 만 15세 이상은 1회 1-2정 적절한 물과 함께 복용. 씹지 않고 삼킵니다.",
+        ingredients={
+            '비사코딜': 5,  
+            '도큐세이트나트륨': 16.75  
+        },
+        class_type="완하제",
+        preg = 2,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2009092300055"
+    ),
+    "메이킨큐장용정": Medication(
+        name = "메이킨큐장용정",
+        description = "장운동을 촉진하고 배변을 유도하는 변비 치료제입니다.",
+        usage = "성인 기준 1회 1~3정(취침 전 복용)",
+        ingredients = {
+            "비사코딜": 5,
+            "도큐세이트나트륨": 14,
+            "카산트라놀": 14,
+            "우르소데옥시콜산": 6
+        },
+        class_type = "완하제",
+        preg = 2,
+        age = 0,
+        url = "https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2014103100002"
+    ),
+    "멜리안정": Medication(
+        name="멜리안정",
+        description="여성용 피임약으로, 저용량 에스트로겐 및 3세대 프로게스틴을 포함한 경구피임제입니다.",
+        usage="성인 여성 기준 1일 1정씩 일정시간에 복용. (21일 복용 후 7일 휴약)",
+        ingredients={
+            '에티닐에스트라디올': 0.02, 
+            '게스토덴': 0.075      
+        },
+        class_type="피임약",
+        preg = 1,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11AKP08G3641"
+    ),
+    "머시론정": Medication(
+        name="머시론정",
+        description="저용량 복합 경구피임약으로 임신 예방을 위해 사용됩니다.",
+        usage="성인 여성 기준: 1일 1정씩 21일간 복용하고, 이어서 7일간 휴약. 동일 시간대 복용 권장.",
+        ingredients={
+            "데소게스트렐": 0.15, 
+            "에티닐에스트라디올": 0.02
+        },
+        class_type="피임약",
+        preg = 1,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11ABBBBB2499"
+    ),
+    "트리싹200mg": Medication(
+        name="트리싹200mg",
+        description="기능성 소화불량, 과민성대장증후군, 위십이지장염 및 식도역류증상 등 위장관 운동조절제로 사용됩니다.",
+        usage="성인 및 만 15세 이상: 1회 200mg, 1일 3회 식전에 복용. 증상 및 연령에 따라 적절히 증감. ",
+        ingredients={
+            '트리메부틴말레산염': 200
+        }, 
+        class_type="위장관치료제",
+        preg = 0,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2019102800004"
+    ),
+    "겔포스엘현탁액": Medication(
+        name = "겔포스엘현탁액",
+        description = "위산과다, 속쓰림, 위통, 더부룩함을 완화하는 제산제입니다.",
+        usage = "성인 기준 1회 1포(20mL), 1일 1~3회 식간 복용",
+        ingredients = {
+            "인산알루미늄겔": 2500,
+            "수산화마그네슘": 20,
+            "시메티콘": 45,
+            "DL-카르니틴염산염":150
+        },
+        class_type = "제산제",
+        preg = 0,
+        age = 0,
+        url = "https://www.health.kr/searchDrug/result_drug.asp?drug_cd=2017122900020"
+    ),
+    
+    "알마겔정": Medication(
+        name="알마겔정",
+        description="위산과다 및 속쓰림 등 위장관 산 관련 증상을 완화하는 제산제입니다.",
+        usage="1회 알마게이트로서 1g을 1일 3최 식후 씹어서 복용",
+        ingredients={"알마게이트" : 500},
+        class_type="제산제",
+        preg = 0,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11A0450A0398"
+    ),
+    
+    "부스코판당의정": Medication(
+        name="부스코판당의정",
+        description="위를 포함한 위·장 평활근의 경련을 완화하고 담도·요로·월경곤란 등에 사용되는 진경제입니다.",
+        usage="성인 기준 부틸스코폴라민브롬화물로서 1회 10–20 mg, 1일 3–5회 복용.",
+        ingredients={"부틸스코폴라민브롬화물": 10},
+        class_type="진경제",
+        preg = 0,
+        age = 0,
+        url="https://www.health.kr/searchDrug/result_drug.asp?drug_cd=A11A0760A0001"
+    ),
+    
+}
+
+# build_catalog.py가 약품 목록과 함께 미리 계산해 넣는 파생 데이터
+CATALOG_DERIVED_KEYS = ("conflict_graph", "alternatives")
+
+def read_catalog_file(path):
+    """build_catalog.py가 생성한 카탈로그 파일을 ({약품명: Medication}, {파생 데이터 키: 값})으로 읽습니다."""
+    with open(path, encoding="utf-8") as f:
+        catalog = json.load(f)
+    medications = {med["name"]: Medication(**med) for med in catalog["medications"]}
+    derived = {key: catalog[key] for key in CATALOG_DERIVED_KEYS if key in catalog}
+    return medications, derived
+
+def load_catalog(path):
+    """build_catalog.py가 생성한 카탈로그 파일을 {약품명: Medication}으로 읽습니다."""
+    return read_catalog_file(path)[0]
+
+CATALOG_PATH = os.environ.get("OTCURE_CATALOG")
+# OTCURE_CATALOG 파일에 들어 있던 파생 데이터 (내장 카탈로그는 비어 있음)
+CATALOG_DERIVED = {}
+if CATALOG_PATH:
+    MED_DB, CATALOG_DERIVED = read_catalog_file(CATALOG_PATH)
+
+# --- DB 데이터 전처리: 모든 고유 성분 목록 추출 ---
+ALL_INGREDIENTS = set()
+for med in MED_DB.values():
+    ALL_INGREDIENTS.update(med.ingredients.keys())
+SORTED_INGREDIENTS = sorted(list(ALL_INGREDIENTS))
+# -------------------------------------------------------------
+
+
+WARNING_RULES = {
+    "ClassType_Overlap_General": {
+        "type": "class_type_count", # 새로운 타입 정의
+        "min_count": 2, # 2개 이상 겹칠 때 경고
+        # message는 함수 내에서 동적으로 생성됩니다.
+        "level": "warning"
+    },
+    #  항히스타민제 섭취 경고 (class_type 기준)
+    "Multiple_Antihistamine": {
+        "type": "class_type_overlap", # 새로운 타입 정의
+        "class_types": ["항히스타민제"], 
+        "message": "🚨 항히스타민제 계열 약물은 졸음 위험이 높습니다. 운전 등 위험한 작업을 피하세요.",
+        "level": "error"
+    }
+}
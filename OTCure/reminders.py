@@ -0,0 +1,123 @@
+"""
+다음 복용 가능 시각 알림 스케줄러.
+
+모든 사용자의 예약 알림을 하나의 최소 힙(due 시각 기준)에 넣고, 스레드 하나가
+가장 이른 알림 시각까지만 기다렸다가 꺼내 처리합니다. 삽입/꺼내기는 O(log n)이며
+사용자별 폴링 루프가 없습니다.
+
+같은 (사용자, 약품)에 새 알림을 예약하면 이전 알림은 힙에서 바로 지우지 않고
+무효 표시만 해두었다가 꺼낼 때 건너뜁니다(lazy deletion).
+
+Streamlit은 서버에서 화면을 밀어 넣을 수 없으므로, 알림이 울리면 사용자별 수신함에 쌓아두고
+해당 세션의 다음 rerun에서 drain()으로 가져가 표시합니다.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+# 수신함을 유지할 최대 사용자 수 (가장 오래 확인하지 않은 사용자부터 제거)
+MAX_INBOXES = 10000
+# 사용자별 수신함에 쌓아둘 최대 알림 수
+MAX_INBOX_SIZE = 20
+
+
+class ReminderScheduler:
+    def __init__(self, on_fire=None):
+        self._heap = []  # (due 타임스탬프, 순번, 사용자, 약품명)
+        self._latest = {}  # (사용자, 약품명) → 유효한 알림의 순번
+        self._by_user = {}  # 사용자 → {약품명: due 타임스탬프} (화면 표시용 색인)
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._inboxes = OrderedDict()
+        self._on_fire = on_fire or self._deliver
+        self._thread = None
+
+    def __len__(self):
+        return len(self._latest)
+
+    def schedule(self, user, product, due):
+        """user의 product 알림을 due(datetime) 시각에 예약합니다. 같은 약품의 이전 알림은 대체됩니다."""
+        with self._cond:
+            seq = next(self._counter)
+            self._latest[(user, product)] = seq
+            self._by_user.setdefault(user, {})[product] = due.timestamp()
+            heapq.heappush(self._heap, (due.timestamp(), seq, user, product))
+            # 새 알림이 가장 이르면 대기 중인 스레드를 깨워 대기 시간을 다시 계산하게 합니다.
+            if self._heap[0][1] == seq:
+                self._cond.notify()
+        self.start()
+
+    def cancel(self, user, product):
+        with self._cond:
+            if self._latest.pop((user, product), None) is not None:
+                self._forget(user, product)
+
+    def pending(self, user):
+        """user의 예약된 알림 {약품명: due 타임스탬프} (화면 표시용)"""
+        with self._cond:
+            return dict(self._by_user.get(user, {}))
+
+    def _forget(self, user, product):
+        products = self._by_user.get(user)
+        if products is not None:
+            products.pop(product, None)
+            if not products:
+                del self._by_user[user]
+
+    def drain(self, user):
+        """user의 수신함에 도착한 알림을 모두 꺼냅니다."""
+        with self._cond:
+            inbox = self._inboxes.pop(user, None)
+        return list(inbox) if inbox else []
+
+    def _deliver(self, user, product, due):
+        # self._cond를 잡은 상태에서 호출됩니다.
+        inbox = self._inboxes.pop(user, None) or deque(maxlen=MAX_INBOX_SIZE)
+        inbox.append((product, due))
+        self._inboxes[user] = inbox
+        while len(self._inboxes) > MAX_INBOXES:
+            self._inboxes.popitem(last=False)
+
+    def _run(self):
+        with self._cond:
+            while True:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, seq, user, product = self._heap[0]
+                delay = due - time.time()
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._heap)
+                if self._latest.get((user, product)) != seq:
+                    continue  # 대체되었거나 취소된 알림
+                del self._latest[(user, product)]
+                self._forget(user, product)
+                try:
+                    self._on_fire(user, product, due)
+                except Exception as e:  # 알림 하나의 실패로 스케줄러 스레드가 멈추지 않도록 합니다.
+                    print(f"[reminders] delivery failed for {product}: {e!r}")
+
+    def start(self):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="dose-reminders", daemon=True)
+                self._thread.start()
+        return self
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """프로세스 공용 ReminderScheduler"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = ReminderScheduler().start()
+    return _scheduler
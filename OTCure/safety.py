@@ -0,0 +1,289 @@
+"""
+OTCure 안전성 검사 로직 (Streamlit 비의존).
+
+napp.py의 화면 출력과 server.py의 JSON 응답이 같은 규칙을 쓰도록
+경고 판정, 성분 합산, 일일 최대 복용량 검사, 선택 가능 여부 판정을 모아둡니다.
+"""
+import re
+import weakref
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache, wraps
+from types import MappingProxyType
+
+from med_db import MAX_DOSE_DB, WARNING_RULES
+
+# 용법에서 하루 복용 횟수를 찾지 못한 경우 가정하는 횟수 (일반적인 "1일 3회")
+DEFAULT_DAILY_DOSES = 3
+
+# 용법에 복용 간격이 없을 때 가정하는 최소 간격 (시간, 1일 1회 약품은 24시간)
+DEFAULT_DOSE_INTERVAL_HOURS = 4
+
+# 스냅샷마다 모든 세션이 공유하는 선택 가능 여부 캐시 크기 (프로필/제외 성분 조합 수)
+ELIGIBILITY_CACHE_SIZE = 512
+
+# 스냅샷마다 모든 세션이 공유하는 장바구니 분석 결과 캐시 크기 (약품 조합 수)
+BASKET_CACHE_SIZE = 1024
+
+# "1일 3회", "1일 2~4회", "1일 최대 8정" 등에서 하루 복용 횟수(상한)를 추출합니다.
+DAILY_DOSE_PATTERN = re.compile(r"1일\s*(?:최대\s*)?(\d+)(?:\s*[~\-–]\s*(\d+))?\s*(?:회|정|캡슐|포)")
+
+# "4-6시간 간격", "4시간 이상 간격", "복용간격은 최소 4시간 이상" 등에서 최소 복용 간격을 추출합니다.
+DOSE_INTERVAL_PATTERN = re.compile(
+    r"(\d+)\s*(?:[~\-–]\s*\d+\s*)?시간\s*(?:이상\s*)?간격|간격[은는]?\s*(?:최소\s*)?(\d+)\s*시간"
+)
+
+
+def snapshot_cache(maxsize):
+    """
+    첫 인자인 카탈로그 스냅샷마다 따로 두는 lru_cache.
+    캐시는 스냅샷의 caches에 붙고 스냅샷은 약한 참조로만 가리키므로, CatalogStore가 새 버전으로
+    교체해 이전 스냅샷을 쓰는 곳이 없어지면 캐시와 함께 바로 해제됩니다.
+    (프로세스 전역 lru_cache는 키로 쓴 이전 스냅샷과 그 mmap을 계속 붙잡습니다.)
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(catalog, *args):
+            cached = catalog.caches.get(func)
+            if cached is None:
+                ref = weakref.ref(catalog)
+                cached = catalog.caches.setdefault(
+                    func, lru_cache(maxsize=maxsize)(lambda *args: func(ref(), *args))
+                )
+            return cached(*args)
+        return wrapper
+    return decorator
+
+
+def triggered_rules(selected_med_names, med_db, warning_rules=WARNING_RULES):
+    """
+    선택된 약품에 대해 WARNING_RULES를 평가하고, 어떤 규칙이 걸렸는지 집계할 수 있도록
+    (규칙 이름, level, message) 목록을 반환합니다.
+    """
+    selected_meds = [med_db[name] for name in selected_med_names if name in med_db]
+
+    # 1. 약물 분류 중복 확인을 위한 딕셔너리 생성
+    class_type_counts = defaultdict(int)
+    for med in selected_meds:
+        class_type_counts[med.class_type] += 1
+
+    # 2. class_type 중복 확인을 위한 집합 생성
+    selected_class_types = set(med.class_type for med in selected_meds)
+
+    triggered = []
+    for rule_name, rule in warning_rules.items():
+        is_triggered = False
+        dynamic_message = rule['message'] if 'message' in rule else ""
+
+        # --- 3. 일반적인 약물 분류 중복 횟수 확인 (ClassType_Overlap_General)
+        if rule['type'] == 'class_type_count':
+            for c_type, count in class_type_counts.items():
+                if count >= rule['min_count']:
+                    is_triggered = True
+                    dynamic_message = f"⚠️ **{c_type} 분류**의 약물을 **{count}개** 중복 섭취하고 있습니다. 성분 중복 여부를 확인하세요."
+                    break
+
+        # --- 4. 특정 클래스 타입 중복 확인 (Multiple_Antihistamine)
+        elif rule['type'] == 'class_type_overlap':
+            if len(selected_class_types.intersection(rule['class_types'])) >= 1:
+                is_triggered = True
+
+        if is_triggered:
+            triggered.append((rule_name, rule['level'], dynamic_message or rule['message']))
+
+    return triggered
+
+
+def basket_ingredients(selected_med_names, med_db):
+    """
+    선택된 약품의 성분별 총량, 성분별 포함 약품, 분류별 약품 목록을 계산합니다.
+    """
+    total_ingredients = defaultdict(float)
+    ingredient_sources = defaultdict(list)
+    meds_by_type = defaultdict(list)
+
+    for name in selected_med_names:
+        med = med_db[name]
+        meds_by_type[med.class_type].append(med)
+
+        for ingredient, amount in med.ingredients.items():
+            total_ingredients[ingredient] += amount
+            ingredient_sources[ingredient].append(name)
+
+    return total_ingredients, ingredient_sources, meds_by_type
+
+
+def duplicate_ingredients(ingredient_sources):
+    """두 개 이상의 약품에 포함된 성분만 골라냅니다."""
+    return {
+        ing: sources for ing, sources in ingredient_sources.items() if len(sources) > 1
+    }
+
+
+class BasketAnalysis:
+    """
+    선택된 약품 조합 하나의 분석 결과 (경고, 성분 총량, 성분별 포함 약품, 중복 성분, 분류별 약품).
+    여러 세션이 캐시를 통해 같은 객체를 공유하므로 모든 필드는 읽기 전용입니다.
+    rules는 warnings 각각을 발생시킨 규칙 이름입니다.
+    """
+    def __init__(self, names, rules, total_ingredients, ingredient_sources, duplicates, meds_by_type):
+        self.names = tuple(names)
+        self.rules = tuple(rule_name for rule_name, _, _ in rules)
+        self.warnings = tuple((level, message) for _, level, message in rules)
+        self.total_ingredients = MappingProxyType(dict(total_ingredients))
+        self.ingredient_sources = MappingProxyType({ing: tuple(v) for ing, v in ingredient_sources.items()})
+        self.duplicate_ingredients = MappingProxyType({ing: tuple(v) for ing, v in duplicates.items()})
+        self.meds_by_type = MappingProxyType({t: tuple(v) for t, v in meds_by_type.items()})
+
+
+@snapshot_cache(maxsize=BASKET_CACHE_SIZE)
+def analyze_basket(catalog, selected_names):
+    """
+    (카탈로그 스냅샷, frozenset(약품명)) 조합별로 한 번만 계산되는 장바구니 분석.
+    약품 순서는 선택 순서와 관계없이 카탈로그 순서로 통일합니다.
+    """
+    names = sorted((name for name in selected_names if name in catalog.med_db), key=catalog.order.__getitem__)
+    rules = triggered_rules(names, catalog.med_db, catalog.warning_rules)
+    total_ingredients, ingredient_sources, meds_by_type = basket_ingredients(names, catalog.med_db)
+    return BasketAnalysis(names, rules, total_ingredients, ingredient_sources,
+                          duplicate_ingredients(ingredient_sources), meds_by_type)
+
+
+def daily_dose_count(med):
+    """
+    용법(usage) 문구 기준 하루 최대 복용 횟수를 반환합니다.
+    범위("1일 2~4회")는 상한을 사용하고, 찾지 못하면 DEFAULT_DAILY_DOSES를 사용합니다.
+    """
+    match = DAILY_DOSE_PATTERN.search(med.usage)
+    if not match:
+        return DEFAULT_DAILY_DOSES
+    return int(match.group(2) or match.group(1))
+
+
+def dose_interval_hours(med):
+    """용법 문구 기준 최소 복용 간격(시간)을 반환합니다."""
+    match = DOSE_INTERVAL_PATTERN.search(med.usage)
+    if match:
+        return int(match.group(1) or match.group(2))
+    if daily_dose_count(med) == 1:
+        return 24
+    return DEFAULT_DOSE_INTERVAL_HOURS
+
+
+def next_dose_time(log, med, now, max_dose_db=MAX_DOSE_DB):
+    """
+    오늘 복용 기록을 기준으로 med를 다시 복용할 수 있는 가장 이른 시각을 반환합니다.
+      - 마지막 복용 시각 + 최소 복용 간격
+      - 오늘 용법상 최대 횟수를 채웠거나, 1회분을 더하면 일일 최대 복용량을 넘는 경우 다음 날 0시
+    지금 바로 복용할 수 있으면 now를 반환합니다.
+    """
+    day = now.strftime("%Y-%m-%d")
+    doses_today = 0
+    last_taken = None
+    for entry in log:
+        if entry["date"] != day or entry.get("compacted"):
+            continue
+        count = sum(1 for m in entry["medications"] if m.name == med.name)
+        if count:
+            doses_today += count
+            taken = datetime.strptime(f"{entry['date']} {entry['time']}", "%Y-%m-%d %H:%M")
+            last_taken = taken if last_taken is None else max(last_taken, taken)
+
+    candidates = [now]
+    if last_taken is not None:
+        candidates.append(last_taken + timedelta(hours=dose_interval_hours(med)))
+
+    totals = daily_ingredient_totals(log, day)
+    for ing, amount in med.ingredients.items():
+        totals[ing] += amount
+    if doses_today >= daily_dose_count(med) or exceeded_ingredients(totals, max_dose_db):
+        candidates.append(datetime.combine(now.date() + timedelta(days=1), datetime.min.time()))
+
+    return max(candidates)
+
+
+def entry_ingredients(entry):
+    """
+    복용 기록 항목 하나의 (성분, 양) 목록을 반환합니다.
+    일별로 압축된 항목(log_retention.compact_log)은 저장된 성분 합계를 그대로 사용합니다.
+    """
+    if entry.get("compacted"):
+        return list(entry["ingredients"].items())
+    return [
+        (ing, amount)
+        for med in entry["medications"]
+        for ing, amount in med.ingredients.items()
+    ]
+
+
+def daily_ingredient_totals(log, day):
+    """
+    복용 기록(log) 중 day("%Y-%m-%d") 날짜 항목의 성분별 누적량을 계산합니다.
+    """
+    totals = defaultdict(float)
+    for entry in log:
+        if entry["date"] == day:
+            for ing, amount in entry_ingredients(entry):
+                totals[ing] += amount
+    return totals
+
+
+def exceeded_ingredients(totals, max_dose_db=MAX_DOSE_DB):
+    """일일 최대 복용량을 초과한 성분을 {성분: (누적량, 최대량)} 형태로 반환합니다."""
+    exceeded = {}
+    for ing, total_amount in totals.items():
+        max_dose = max_dose_db.get(ing)
+        if max_dose and total_amount > max_dose:
+            exceeded[ing] = (total_amount, max_dose)
+    return exceeded
+
+
+def check_daily_limit(log, medications, day, max_dose_db=MAX_DOSE_DB):
+    """
+    기존 기록에 medications를 추가로 복용했을 때의 day 날짜 누적량을 검사합니다.
+    (누적량, 초과 여부)를 반환합니다.
+    """
+    new_entry = {"date": day, "medications": medications}
+    totals = daily_ingredient_totals(list(log) + [new_entry], day)
+    return totals, bool(exceeded_ingredients(totals, max_dose_db))
+
+
+def med_eligibility(med, is_pregnant, is_elderly, excluded_ingredients):
+    """
+    프로필과 제외 성분에 따른 약품의 (비활성화 여부, 사유 문구)를 반환합니다.
+    """
+    is_disabled = False
+    reason = ""
+
+    # 1. 임산부/수유부 체크
+    if is_pregnant:
+        if med.preg == 1: # 임부 금기
+            is_disabled = True
+            reason = " (임부 금기)"
+        elif med.preg == 2: # 임부 주의: 선택 가능 + 안내 문구만
+            reason = " (임부 주의)"
+
+    # 2. 고령자 주의
+    if not is_disabled and is_elderly and med.age == 1:
+        is_disabled = True
+        reason = " (연령주의)"
+
+    # 3. 제외 성분 포함
+    if not is_disabled and any(ing in excluded_ingredients for ing in med.ingredients):
+        is_disabled = True
+        reason = " (제외 성분 포함)"
+
+    return is_disabled, reason
+
+
+@snapshot_cache(maxsize=ELIGIBILITY_CACHE_SIZE)
+def eligibility_mask(catalog, is_pregnant, is_elderly, excluded_ingredients):
+    """
+    카탈로그 전체 약품의 {약품명: (비활성화 여부, 사유 문구)}를 반환합니다.
+    (카탈로그 스냅샷, 임신 여부, 고령 여부, frozenset(제외 성분)) 조합마다 한 번만 계산되어
+    모든 세션이 공유하므로, 반환값은 읽기 전용 매핑입니다.
+    """
+    return MappingProxyType({
+        name: med_eligibility(med, is_pregnant, is_elderly, excluded_ingredients)
+        for name, med in catalog.med_db.items()
+    })
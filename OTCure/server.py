@@ -0,0 +1,222 @@
+"""
+OTCure 안전성 검사 HTTP 서비스 (약국 키오스크/POS 연동용).
+
+Streamlit UI 없이 napp.py와 같은 카탈로그(MED_DB)와 규칙(WARNING_RULES, MAX_DOSE_DB)으로
+JSON 요청을 처리합니다. 카탈로그는 프로세스 시작 시 한 번 로드되어 읽기 전용으로 공유되며,
+OTCURE_CATALOG_DIR에 새 버전이 발행되면 요청을 멈추지 않고 교체됩니다(catalog.py).
+각 요청은 시작 시점의 스냅샷 하나로 끝까지 처리됩니다.
+
+실행:
+    python server.py --port 8600 --workers 4
+
+엔드포인트:
+    POST /check       {"products": [...]}
+    POST /check-log   {"products": [...], "log": [{"date": "YYYY-MM-DD", "products": [...]}], "date": "YYYY-MM-DD"}
+    GET  /eligible?pregnant=1&elderly=0&exclude=성분1,성분2
+    GET  /health
+"""
+import argparse
+import json
+import os
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from catalog import get_catalog, get_store
+from safety import (
+    analyze_basket,
+    check_daily_limit,
+    eligibility_mask,
+    exceeded_ingredients,
+)
+
+
+# 요청 본문 최대 크기 (바이트). 장바구니와 며칠치 복용 기록이면 충분합니다.
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class RequestError(Exception):
+    """잘못된 요청 (400 응답)"""
+
+
+def _split_known(names, med_db):
+    """요청된 약품명을 카탈로그에 있는 것과 없는 것으로 나눕니다."""
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise RequestError("'products'는 약품명 리스트여야 합니다.")
+    known = [name for name in names if name in med_db]
+    unknown = [name for name in names if name not in med_db]
+    return known, unknown
+
+
+def handle_check(catalog, body):
+    """장바구니 단위 검사: 경고 규칙, 중복 성분, 성분별 총량"""
+    known, unknown = _split_known(body.get("products"), catalog.med_db)
+    analysis = analyze_basket(catalog, frozenset(known))
+    return {
+        "catalog_version": catalog.version,
+        "warnings": [{"level": level, "message": message} for level, message in analysis.warnings],
+        "duplicates": {ing: list(sources) for ing, sources in analysis.duplicate_ingredients.items()},
+        "total_ingredients": dict(analysis.total_ingredients),
+        "unknown": unknown,
+    }
+
+
+def handle_check_log(catalog, body):
+    """하루 복용 기록 + 새 장바구니의 일일 최대 복용량 검사 (on_log_save와 동일한 기준)"""
+    known, unknown = _split_known(body.get("products"), catalog.med_db)
+    day = body.get("date") or date.today().strftime("%Y-%m-%d")
+    if not isinstance(day, str):
+        raise RequestError("'date'는 YYYY-MM-DD 문자열이어야 합니다.")
+    entries = body.get("log") or []
+    if not isinstance(entries, list):
+        raise RequestError("'log'는 기록 객체 리스트여야 합니다.")
+
+    log = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("date", day), str):
+            raise RequestError("'log' 항목은 {\"date\": \"YYYY-MM-DD\", \"products\": [...]} 객체여야 합니다.")
+        entry_known, entry_unknown = _split_known(entry.get("products"), catalog.med_db)
+        unknown.extend(entry_unknown)
+        log.append({
+            "date": entry.get("date", day),
+            "medications": [catalog.med_db[name] for name in entry_known],
+        })
+
+    medications = [catalog.med_db[name] for name in known]
+    totals, triggered = check_daily_limit(log, medications, day, catalog.max_dose_db)
+    return {
+        "catalog_version": catalog.version,
+        "allowed": not triggered,
+        "date": day,
+        "totals": totals,
+        "exceeded": {
+            ing: {"total": total, "max": max_dose}
+            for ing, (total, max_dose) in exceeded_ingredients(totals, catalog.max_dose_db).items()
+        },
+        "unknown": unknown,
+    }
+
+
+def handle_eligible(catalog, query):
+    """프로필(임신/고령)과 제외 성분 기준으로 선택 가능한 약품 목록"""
+    def flag(key):
+        return query.get(key, ["0"])[0].lower() in ("1", "true", "yes")
+
+    excluded = set()
+    for value in query.get("exclude", []):
+        excluded.update(ing.strip() for ing in value.split(",") if ing.strip())
+
+    eligibility = eligibility_mask(catalog, flag("pregnant"), flag("elderly"), frozenset(excluded))
+    products = [
+        {"name": name, "class_type": catalog.med_db[name].class_type, "note": reason.strip(" ()")}
+        for name, (is_disabled, reason) in eligibility.items()
+        if not is_disabled
+    ]
+    return {"catalog_version": catalog.version, "products": products}
+
+
+POST_ROUTES = {
+    "/check": handle_check,
+    "/check-log": handle_check_log,
+}
+
+
+class SafetyCheckHandler(BaseHTTPRequestHandler):
+    # keep-alive로 단말기가 연결을 재사용할 수 있도록 HTTP/1.1 사용
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문이 따로 전송될 때 Nagle 알고리즘으로 인한 ~40ms 지연을 막습니다.
+    disable_nagle_algorithm = True
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        catalog = get_catalog()
+        if url.path == "/eligible":
+            self._send_json(200, handle_eligible(catalog, parse_qs(url.query)))
+        elif url.path == "/health":
+            self._send_json(200, {"status": "ok", "catalog_version": catalog.version,
+                                  "products": len(catalog.med_db)})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        handler = POST_ROUTES.get(urlparse(self.path).path)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            # 본문 길이를 알 수 없으므로 연결을 재사용하지 않습니다.
+            self.close_connection = True
+            self._send_json(400, {"error": "잘못된 Content-Length"})
+            return
+        if length > MAX_BODY_BYTES:
+            # 본문을 읽지 않고 거절하므로 연결을 재사용하지 않습니다.
+            self.close_connection = True
+            self._send_json(413, {"error": f"요청 본문이 너무 큽니다 (최대 {MAX_BODY_BYTES}바이트)"})
+            return
+        raw = self.rfile.read(length) if length > 0 else b""
+        if handler is None:
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            body = json.loads(raw or b"{}")
+            if not isinstance(body, dict):
+                raise RequestError("요청 본문은 JSON 객체여야 합니다.")
+            self._send_json(200, handler(get_catalog(), body))
+        except (ValueError, RequestError) as e:
+            self._send_json(400, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        # 요청마다 stderr에 쓰면 처리량이 크게 떨어지므로 기본 접근 로그는 끕니다.
+        pass
+
+
+def serve(host, port, workers):
+    """
+    workers > 1이면 리스닝 소켓을 연 뒤 fork하여 여러 프로세스가 같은 소켓에서 accept합니다.
+    카탈로그는 fork 이전에 로드되므로 모든 워커가 읽기 전용으로 공유합니다.
+    각 프로세스 안에서는 요청마다 스레드가 할당됩니다.
+    """
+    # 감시 스레드가 교체 도중 잡고 있던 잠금이 자식에 복제되지 않도록 fork 전에는 시작하지 않습니다.
+    store = get_store(start=False)
+    httpd = ThreadingHTTPServer((host, port), SafetyCheckHandler)
+    httpd.daemon_threads = True
+
+    children = []
+    for _ in range(max(workers, 1) - 1):
+        pid = os.fork()
+        if pid == 0:
+            children = []
+            break
+        children.append(pid)
+
+    # fork가 끝난 뒤 프로세스마다 자신의 카탈로그 감시 스레드를 시작합니다.
+    store.start()
+    print(f"OTCure safety service (pid {os.getpid()}) listening on http://{host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OTCure 안전성 검사 HTTP 서비스")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="워커 프로세스 수 (각 프로세스는 요청별 스레드로 처리)")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
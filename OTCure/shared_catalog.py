@@ -0,0 +1,470 @@
+"""
+한 호스트의 여러 워커 프로세스가 공유하는 카탈로그 세그먼트.
+
+카탈로그 스냅샷을 평평한 배열들로 컴파일해 파일 하나(/dev/shm 등)에 쓰고,
+각 프로세스는 이 파일을 읽기 전용 mmap으로 붙여 사용합니다. 페이지는 OS 페이지 캐시에서
+공유되므로 카탈로그 메모리는 프로세스마다가 아니라 호스트당 한 번만 듭니다.
+
+파일 구조:
+    b"OTCURE02" | 헤더 길이(uint64) | JSON 헤더 | 8바이트 정렬된 섹션들
+
+    JSON 헤더에는 섹션 위치와 작은 표(max_dose_db, warning_rules, 조합 종류 이름)만 두고,
+    약품 수에 비례하는 데이터는 모두 아래 섹션에 둡니다.
+
+    strings       UTF-8 문자열 blob
+    str_offsets   uint64  문자열 k의 시작 위치 (k = 약품 i의 필드 f → i*6+f, 성분 j → 6*n+j)
+                          약품 필드 0은 카탈로그 키(약품명), 1~5는 STRING_FIELDS
+    ing_indptr    uint64  약품별 성분 구간 (CSR 성분 행렬)
+    ing_indices   uint32  성분 번호
+    ing_amounts   float64 성분량 (mg)
+    preg, age     uint8
+    bitsets       uint64  약품별 성분 비트셋 (words_per_product 개씩)
+    name_sorted   uint32  약품명 정렬 순서의 약품 번호 (이름 → 번호 이진 탐색용)
+    alt_indptr    uint64  대체 약품 목록 구간 (CSR)
+    alt_indices   uint32  대체 약품 번호
+    prod_indptr   uint64  성분별 포함 약품 구간 (CSC 성분 행렬, 성분 → 약품 역색인)
+    prod_indices  uint32  약품 번호 (카탈로그 순서)
+    cg_indptr     uint64  약품별 충돌 조합 구간 (CSR)
+    cg_kind       uint8   조합 종류 번호 (헤더의 conflict_kinds)
+    cg_ratio      float64 초과 비율 (없으면 NaN)
+    cg_with_indptr, cg_with   uint64, uint32  조합별 함께 복용하는 약품 번호
+    cg_ing_indptr, cg_ings    uint64, uint32  조합별 관련 성분 번호
+
+Medication 객체는 접근할 때 만들어지며, 자주 쓰는 것만 프로세스별 LRU에 남습니다.
+
+세그먼트에 붙은 프로세스는 세그먼트를 쓰는 동안 잠금 파일(<세그먼트>.lock)에 공유 잠금(LOCK_SH)을
+잡고 있습니다. 새 세그먼트를 내보낸 프로세스는 다른 세그먼트 중 배타 잠금(LOCK_EX|LOCK_NB)을 바로
+잡을 수 있는 것, 즉 어떤 프로세스도 쓰지 않는 것만 지웁니다(잠금/임시 파일 포함).
+"""
+import bisect
+import fcntl
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from abc import abstractmethod
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
+
+from med_db import Medication
+
+SEGMENT_FORMAT = 2
+MAGIC = b"OTCURE%02d" % SEGMENT_FORMAT
+STRING_FIELDS = ("name", "description", "usage", "class_type", "url")
+# 카탈로그 키 + STRING_FIELDS
+STRINGS_PER_PRODUCT = 1 + len(STRING_FIELDS)
+# 프로세스마다 만들어 둘 Medication 객체 수
+MEDICATION_CACHE_SIZE = 4096
+SEGMENT_PREFIX = "otcure-catalog-"
+
+
+def segment_path(directory, key):
+    # 파일 구조가 바뀌면 같은 키라도 이전 형식의 파일에 붙지 않도록 형식 번호를 이름에 넣습니다.
+    return os.path.join(directory, f"{SEGMENT_PREFIX}v{SEGMENT_FORMAT}-{key}.bin")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def export_segment(catalog, path):
+    """Catalog 스냅샷을 공유 세그먼트 파일로 컴파일합니다 (임시 파일에 쓴 뒤 교체)."""
+    names = list(catalog.med_db)
+    n = len(names)
+    ingredient_ids = {ing: j for j, ing in enumerate(catalog.sorted_ingredients)}
+    words = max(1, (len(ingredient_ids) + 63) // 64)
+
+    strings = bytearray()
+    str_offsets = []
+    for name in names:
+        med = catalog.med_db[name]
+        for value in (name,) + tuple(getattr(med, field) for field in STRING_FIELDS):
+            str_offsets.append(len(strings))
+            strings += value.encode("utf-8")
+    for ing in catalog.sorted_ingredients:
+        str_offsets.append(len(strings))
+        strings += ing.encode("utf-8")
+    str_offsets.append(len(strings))
+
+    ing_indptr, ing_indices, ing_amounts = [0], [], []
+    preg, age, bitsets = [], [], []
+    products_by_ingredient = [[] for _ in ingredient_ids]
+    for i, name in enumerate(names):
+        med = catalog.med_db[name]
+        bits = 0
+        for ing, amount in med.ingredients.items():
+            ing_indices.append(ingredient_ids[ing])
+            ing_amounts.append(float(amount))
+            bits |= 1 << ingredient_ids[ing]
+            products_by_ingredient[ingredient_ids[ing]].append(i)
+        ing_indptr.append(len(ing_indices))
+        preg.append(med.preg)
+        age.append(med.age)
+        bitsets.extend((bits >> (64 * w)) & 0xFFFFFFFFFFFFFFFF for w in range(words))
+
+    prod_indptr, prod_indices = [0], []
+    for products in products_by_ingredient:
+        prod_indices.extend(products)
+        prod_indptr.append(len(prod_indices))
+
+    order = {name: i for i, name in enumerate(names)}
+    alt_indptr, alt_indices = [0], []
+    for name in names:
+        alt_indices.extend(order[other] for other in catalog.alternatives.get(name, ()))
+        alt_indptr.append(len(alt_indices))
+
+    kinds = sorted({item["kind"] for items in catalog.conflict_graph.values() for item in items})
+    kind_ids = {kind: k for k, kind in enumerate(kinds)}
+    cg_indptr, cg_kind, cg_ratio = [0], [], []
+    cg_with_indptr, cg_with, cg_ing_indptr, cg_ings = [0], [], [0], []
+    for name in names:
+        for item in catalog.conflict_graph.get(name, ()):
+            cg_kind.append(kind_ids[item["kind"]])
+            cg_ratio.append(float(item.get("ratio", math.nan)))
+            cg_with.extend(order[other] for other in item["with"])
+            cg_with_indptr.append(len(cg_with))
+            cg_ings.extend(ingredient_ids[ing] for ing in item["ingredients"])
+            cg_ing_indptr.append(len(cg_ings))
+        cg_indptr.append(len(cg_kind))
+
+    sections = [
+        ("strings", "B", bytes(strings)),
+        ("str_offsets", "Q", str_offsets),
+        ("ing_indptr", "Q", ing_indptr),
+        ("ing_indices", "I", ing_indices),
+        ("ing_amounts", "d", ing_amounts),
+        ("preg", "B", preg),
+        ("age", "B", age),
+        ("bitsets", "Q", bitsets),
+        ("name_sorted", "I", sorted(range(n), key=names.__getitem__)),
+        ("alt_indptr", "Q", alt_indptr),
+        ("alt_indices", "I", alt_indices),
+        ("prod_indptr", "Q", prod_indptr),
+        ("prod_indices", "I", prod_indices),
+        ("cg_indptr", "Q", cg_indptr),
+        ("cg_kind", "B", cg_kind),
+        ("cg_ratio", "d", cg_ratio),
+        ("cg_with_indptr", "Q", cg_with_indptr),
+        ("cg_with", "I", cg_with),
+        ("cg_ing_indptr", "Q", cg_ing_indptr),
+        ("cg_ings", "I", cg_ings),
+    ]
+
+    payloads = []
+    for section, typecode, values in sections:
+        data = values if isinstance(values, bytes) else struct.pack(f"<{len(values)}{typecode}", *values)
+        payloads.append((section, typecode, data))
+
+    header = {
+        "version": catalog.version,
+        "products": n,
+        "ingredients": len(ingredient_ids),
+        "words_per_product": words,
+        "max_dose_db": dict(catalog.max_dose_db),
+        "warning_rules": dict(catalog.warning_rules),
+        "conflict_kinds": kinds,
+        "sections": {},
+    }
+    # 섹션 위치는 헤더 길이에 따라 달라지므로, 위치 값의 자리수가 안정될 때까지 다시 계산합니다.
+    header_bytes = b""
+    while True:
+        offset = _align(len(MAGIC) + 8 + len(header_bytes))
+        for section, typecode, data in payloads:
+            header["sections"][section] = [offset, len(data), typecode]
+            offset = _align(offset + len(data))
+        new_header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if len(new_header_bytes) == len(header_bytes):
+            break
+        header_bytes = new_header_bytes
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for section, typecode, data in payloads:
+            f.seek(header["sections"][section][0])
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SharedSegment:
+    """
+    세그먼트 파일을 읽기 전용 mmap으로 붙여 배열 뷰를 제공합니다.
+    lock은 attach_or_export가 공유 잠금을 잡아 둔 잠금 파일로, 이 객체가 해제될 때 함께 닫혀
+    잠금이 풀립니다 (그때까지 다른 프로세스가 세그먼트를 지우지 않습니다).
+    """
+
+    def __init__(self, path, lock=None):
+        self._lock = lock
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"not an OTCure catalog segment: {path}")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._mmap[start:start + header_len])
+        self.version = self.header["version"]
+        self.products = self.header["products"]
+        self.words = self.header["words_per_product"]
+
+        buffer = memoryview(self._mmap)
+        for section, (offset, length, typecode) in self.header["sections"].items():
+            view = buffer[offset:offset + length]
+            setattr(self, section, view if section == "strings" else view.cast(typecode))
+
+    def string(self, k):
+        return bytes(self.strings[self.str_offsets[k]:self.str_offsets[k + 1]]).decode("utf-8")
+
+    def product_name(self, i):
+        return self.string(i * STRINGS_PER_PRODUCT)
+
+    def ingredient_name(self, j):
+        return self.string(self.products * STRINGS_PER_PRODUCT + j)
+
+    def ingredient_id(self, name):
+        """성분 번호는 성분명 정렬 순서이므로 바로 이진 탐색합니다. 없으면 None."""
+        count = self.header["ingredients"]
+        j = bisect.bisect_left(range(count), name, key=self.ingredient_name)
+        if j < count and self.ingredient_name(j) == name:
+            return j
+        return None
+
+    def product_id(self, name):
+        """이름 정렬 테이블을 이진 탐색해 약품 번호를 찾습니다. 없으면 None."""
+        lo = bisect.bisect_left(range(self.products), name,
+                                key=lambda k: self.product_name(self.name_sorted[k]))
+        if lo < self.products and self.product_name(self.name_sorted[lo]) == name:
+            return self.name_sorted[lo]
+        return None
+
+    def ingredients(self, i):
+        start, end = self.ing_indptr[i], self.ing_indptr[i + 1]
+        return {
+            self.ingredient_name(self.ing_indices[k]): self.ing_amounts[k]
+            for k in range(start, end)
+        }
+
+    def bitset(self, i):
+        value = 0
+        for w in range(self.words):
+            value |= self.bitsets[i * self.words + w] << (64 * w)
+        return value
+
+    def medication(self, i):
+        fields = {
+            field: self.string(i * STRINGS_PER_PRODUCT + 1 + f)
+            for f, field in enumerate(STRING_FIELDS)
+        }
+        return Medication(ingredients=self.ingredients(i), preg=self.preg[i], age=self.age[i], **fields)
+
+    def alternatives(self, i):
+        start, end = self.alt_indptr[i], self.alt_indptr[i + 1]
+        return tuple(self.product_name(self.alt_indices[k]) for k in range(start, end))
+
+    def ingredient_products(self, j):
+        start, end = self.prod_indptr[j], self.prod_indptr[j + 1]
+        return tuple(self.product_name(self.prod_indices[k]) for k in range(start, end))
+
+    def conflicts(self, i):
+        items = []
+        for e in range(self.cg_indptr[i], self.cg_indptr[i + 1]):
+            item = {
+                "with": [
+                    self.product_name(self.cg_with[k])
+                    for k in range(self.cg_with_indptr[e], self.cg_with_indptr[e + 1])
+                ],
+                "kind": self.header["conflict_kinds"][self.cg_kind[e]],
+                "ingredients": [
+                    self.ingredient_name(self.cg_ings[k])
+                    for k in range(self.cg_ing_indptr[e], self.cg_ing_indptr[e + 1])
+                ],
+            }
+            if not math.isnan(self.cg_ratio[e]):
+                item["ratio"] = self.cg_ratio[e]
+            items.append(item)
+        return items
+
+    def sorted_ingredients(self):
+        return tuple(self.ingredient_name(j) for j in range(self.header["ingredients"]))
+
+
+class _SegmentMapping(Mapping):
+    """약품명을 키로 세그먼트를 조회하는 읽기 전용 매핑 (순회 순서는 카탈로그 순서)"""
+
+    def __init__(self, segment):
+        self.segment = segment
+
+    @abstractmethod
+    def _value(self, i):
+        """약품 번호 i의 값"""
+
+    def __getitem__(self, name):
+        i = self.segment.product_id(name)
+        if i is None:
+            raise KeyError(name)
+        return self._value(i)
+
+    def __contains__(self, name):
+        return self.segment.product_id(name) is not None
+
+    def __iter__(self):
+        return (self.segment.product_name(i) for i in range(self.segment.products))
+
+    def __len__(self):
+        return self.segment.products
+
+
+class SharedMedDB(_SegmentMapping):
+    """약품명 → Medication (접근 시 생성, 프로세스별 LRU에 보관)"""
+
+    def __init__(self, segment, cache_size=MEDICATION_CACHE_SIZE):
+        super().__init__(segment)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        # 서버 스레드/Streamlit 세션 스레드가 함께 조회하므로 LRU 갱신은 잠금 안에서 합니다.
+        self._cache_lock = threading.Lock()
+
+    def _value(self, i):
+        with self._cache_lock:
+            med = self._cache.get(i)
+            if med is not None:
+                self._cache.move_to_end(i)
+                return med
+        # Medication 생성(문자열 디코딩)은 잠금 밖에서 합니다. 같은 약품을 동시에 만들어도 결과는 같습니다.
+        med = self.segment.medication(i)
+        with self._cache_lock:
+            self._cache[i] = med
+            self._cache.move_to_end(i)
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return med
+
+    def values(self):
+        return (self._value(i) for i in range(self.segment.products))
+
+    def items(self):
+        return ((self.segment.product_name(i), self._value(i)) for i in range(self.segment.products))
+
+
+class SharedOrder(_SegmentMapping):
+    """약품명 → 카탈로그 내 순서"""
+
+    def _value(self, i):
+        return i
+
+
+class SharedAlternatives(_SegmentMapping):
+    """약품명 → 대체 약품명 튜플"""
+
+    def _value(self, i):
+        return self.segment.alternatives(i)
+
+
+class SharedConflictGraph(_SegmentMapping):
+    """약품명 → 충돌 조합 목록 (conflicts.build_conflict_graph 형식)"""
+
+    def _value(self, i):
+        return self.segment.conflicts(i)
+
+
+class SharedIngredientIndex(Mapping):
+    """성분 → 포함 약품명 튜플 (카탈로그 순서)"""
+
+    def __init__(self, segment):
+        self.segment = segment
+
+    def __getitem__(self, ing):
+        j = self.segment.ingredient_id(ing)
+        if j is None:
+            raise KeyError(ing)
+        return self.segment.ingredient_products(j)
+
+    def __contains__(self, ing):
+        return self.segment.ingredient_id(ing) is not None
+
+    def __iter__(self):
+        return (self.segment.ingredient_name(j) for j in range(self.segment.header["ingredients"]))
+
+    def __len__(self):
+        return self.segment.header["ingredients"]
+
+
+def _segment_file_name(name):
+    """세그먼트 관련 파일(세그먼트, 잠금, 임시 파일) 이름에서 세그먼트 파일 이름을 구합니다. 아니면 None."""
+    if not name.startswith(SEGMENT_PREFIX) or ".bin" not in name:
+        return None
+    return name[:name.index(".bin") + len(".bin")]
+
+
+def _holds_current_lock(lock, lock_path):
+    """잡은 잠금 파일이 정리 과정에서 지워지거나 새로 만들어지지 않고 아직 lock_path에 있는지"""
+    try:
+        return os.path.samestat(os.fstat(lock.fileno()), os.stat(lock_path))
+    except FileNotFoundError:
+        return False
+
+
+def remove_stale_segments(directory, keep_path):
+    """
+    keep_path가 아닌 세그먼트 중 붙어 있는 프로세스가 없는 것(배타 잠금을 바로 잡을 수 있는 것)을
+    잠금/임시 파일과 함께 지웁니다. 지운 세그먼트 수를 반환합니다.
+    """
+    keep = os.path.basename(keep_path)
+    files = defaultdict(list)  # 세그먼트 파일 이름 → 관련 파일 이름
+    for entry in os.scandir(directory):
+        segment = _segment_file_name(entry.name)
+        if segment is not None and segment != keep:
+            files[segment].append(entry.name)
+
+    removed = 0
+    for segment, names in files.items():
+        lock_path = os.path.join(directory, f"{segment}.lock")
+        try:
+            lock = open(lock_path, "a")
+        except OSError:
+            continue  # 권한이 없는 파일
+        with lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # 아직 이 세그먼트를 쓰는 프로세스(또는 내보내는 중인 프로세스)가 있음
+            if not _holds_current_lock(lock, lock_path):
+                continue  # 다른 프로세스가 먼저 정리함
+            # 잠금 파일은 마지막에 지워, 그 사이에 붙으려는 프로세스는 잠금을 기다렸다가 다시 확인하게 합니다.
+            for name in names + [f"{segment}.lock"]:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+        removed += 1
+    return removed
+
+
+def attach_or_export(directory, key, build_catalog):
+    """
+    key의 세그먼트가 없으면 build_catalog()로 스냅샷을 만들어 내보내고, 세그먼트를 붙여 반환합니다.
+    잠금 파일에 배타 잠금을 잡은 한 프로세스만 내보내고, 나머지는 공유 잠금을 기다렸다가 붙습니다.
+    반환된 세그먼트가 살아 있는 동안 공유 잠금을 유지해 정리(remove_stale_segments)되지 않게 합니다.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = segment_path(directory, key)
+    lock_path = f"{path}.lock"
+    while True:
+        lock = open(lock_path, "a")
+        try:
+            if not os.path.exists(path):
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if not os.path.exists(path) and _holds_current_lock(lock, lock_path):
+                    export_segment(build_catalog(), path)
+                    remove_stale_segments(directory, path)
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            if _holds_current_lock(lock, lock_path) and os.path.exists(path):
+                return SharedSegment(path, lock)
+        except BaseException:
+            lock.close()
+            raise
+        # 잠금을 기다리는 사이 정리된 세그먼트: 새 잠금 파일로 다시 시도합니다.
+        lock.close()
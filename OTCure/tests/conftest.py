@@ -0,0 +1,10 @@
+import os
+import sys
+
+# 앱 모듈은 OTCure 디렉터리를 기준으로 서로 import합니다 (from med_db import ...).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 실행 환경의 설정이 테스트에 섞이지 않도록 내장 카탈로그만 사용합니다.
+for key in list(os.environ):
+    if key.startswith("OTCURE_"):
+        del os.environ[key]
@@ -0,0 +1,57 @@
+import json
+import os
+
+from audit import run_audit
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "samples", "dispensing.csv")
+
+
+def read_flagged(path):
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    return {(record["customer"], record["date"]): record for record in records}
+
+
+def test_sample_dispensing(tmp_path):
+    output = str(tmp_path / "flagged.jsonl")
+    summary = run_audit([SAMPLE], output, workers=2, tmp_dir=str(tmp_path))
+    flagged = read_flagged(output)
+
+    assert (summary["rows"], summary["skipped_rows"]) == (44, 0)
+    assert (summary["baskets"], summary["customers"], summary["flagged_baskets"]) == (16, 8, 12)
+    assert summary["checks"] == {"warning_rule": 11, "duplicate_ingredient": 5, "daily_limit": 1}
+    assert summary["rules"] == {"Multiple_Antihistamine": 8, "ClassType_Overlap_General": 6}
+    assert summary["duplicate_ingredients"]["아세트아미노펜"] == 4
+    assert len(flagged) == 12
+
+    # 같은 고객·날짜의 여러 줄은 한 장바구니로 묶고 수량을 합산합니다.
+    basket = flagged[("C0001", "2026-10-18")]
+    assert basket["products"] == {"타이레놀콜드에스정": 4, "훼스탈플러스정": 3, "콜대원코프큐시럽": 1}
+    assert set(basket["duplicates"]["아세트아미노펜"]) == {"타이레놀콜드에스정", "콜대원코프큐시럽"}
+    assert ("C0001", "2026-10-17") not in flagged
+
+    # 카탈로그에 없는 제품은 검사에서 빼고 따로 집계합니다.
+    assert summary["unknown_products"] == {"없는약품정": 1}
+    assert flagged[("C0005", "2026-10-18")]["unknown_products"] == {"없는약품정": 1}
+    assert "없는약품정" not in flagged[("C0005", "2026-10-18")]["products"]
+
+    # 일일 최대량은 QTY를 곱해 합산합니다 (타이레놀500mg 9정 = 4500mg > 4000mg).
+    assert summary["exceeded_ingredients"] == {"아세트아미노펜": 1}
+    assert flagged[("C0003", "2026-10-18")]["exceeded"] == {"아세트아미노펜": {"total": 4500.0, "max": 4000}}
+
+
+def test_basket_split_across_input_files(tmp_path):
+    with open(SAMPLE, encoding="utf-8") as f:
+        header, *rows = f.read().splitlines()
+    # C0001의 10-18 기록을 두 입력 파일에 나눠 넣어도 한 장바구니로 검사합니다.
+    first, second = tmp_path / "a.csv", tmp_path / "b.csv"
+    first.write_text("\n".join([header] + rows[::2]) + "\n", encoding="utf-8")
+    second.write_text("\n".join([header] + rows[1::2]) + "\n", encoding="utf-8")
+
+    output = str(tmp_path / "flagged.jsonl")
+    summary = run_audit([str(first), str(second)], output, workers=2, tmp_dir=str(tmp_path))
+    expected = run_audit([SAMPLE], str(tmp_path / "expected.jsonl"), workers=2, tmp_dir=str(tmp_path))
+
+    summary.pop("seconds"), expected.pop("seconds")
+    assert summary == expected
+    assert read_flagged(output)[("C0001", "2026-10-18")]["products"]["타이레놀콜드에스정"] == 4
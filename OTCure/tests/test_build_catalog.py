@@ -0,0 +1,114 @@
+import glob
+import json
+import os
+import tracemalloc
+
+from build_catalog import build_catalog, iter_records
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "samples", "catalog")
+
+
+def sample_paths(pattern):
+    return sorted(glob.glob(os.path.join(SAMPLES, pattern)))
+
+
+def build_samples(ingredient_paths=None, workers=2, **kwargs):
+    return build_catalog(
+        sample_paths("products_*"),
+        ingredient_paths or sample_paths("ingredients_*"),
+        os.path.join(SAMPLES, "dur_pregnancy.csv"),
+        os.path.join(SAMPLES, "dur_elderly.csv"),
+        workers=workers,
+        **kwargs,
+    )
+
+
+def test_sample_dumps():
+    catalog = build_samples()
+    meds = {med["name"]: med for med in catalog["medications"]}
+
+    assert catalog["stats"]["medications"] == 7
+    assert catalog["stats"]["missing_ingredients"] == 0
+    # 제품명 끝의 "(성분명)" 제거, 단위 환산(㎍ → mg), 하이픈 통일
+    assert meds["지르텍정"]["ingredients"] == {"세티리진염산염": 10.0}
+    assert meds["둘코락스에스장용정"]["ingredients"]["비사코딜"] == 5.0
+    assert "DL-메틸에페드린염산염" in meds["판콜에이내복액"]["ingredients"]
+    # NSAID 성분이 있는 해열진통제는 소염진통제, DUR 등급 반영
+    assert meds["부루펜정200mg"]["class_type"] == "소염진통제"
+    assert meds["부루펜정200mg"]["preg"] == 2
+    assert meds["부루펜정200mg"]["age"] == 1
+    assert meds["타이레놀정500mg"]["preg"] == 0
+    # 대체 약품 목록도 카탈로그 파일에 미리 계산해 넣습니다.
+    assert set(catalog["alternatives"]) == set(meds)
+    assert "게보린정" in catalog["alternatives"]["타이레놀정500mg"]
+
+
+def test_ingredients_split_across_files(tmp_path):
+    # 판콜에이내복액(200001003)의 성분 행을 두 파일로 나눕니다.
+    with open(sample_paths("ingredients_001.csv")[0], encoding="utf-8") as f:
+        header, *rows = f.read().splitlines()
+    split = [row for row in rows if row.startswith("200001003,")]
+    first, second = tmp_path / "ingredients_a.csv", tmp_path / "ingredients_b.csv"
+    first.write_text("\n".join([header] + [r for r in rows if r not in split[1:]]) + "\n", encoding="utf-8")
+    second.write_text("\n".join([header] + split[1:] + ["200001003,카페인무수물,20,mg"]) + "\n", encoding="utf-8")
+
+    paths = [str(first), str(second)] + sample_paths("ingredients_*.xml")
+    meds = {med["name"]: med for med in build_samples(paths)["medications"]}
+    expected = {
+        med["name"]: dict(med["ingredients"]) for med in build_samples()["medications"]
+    }["판콜에이내복액"]
+    expected["카페인무수물"] += 20
+
+    assert len(split) > 1
+    assert meds["판콜에이내복액"]["ingredients"] == expected
+
+
+def test_builtin_catalog_uses_graph_of_catalog_file(tmp_path, monkeypatch):
+    import catalog
+    import med_db
+
+    # 샘플 약품끼리 초과 조합이 생기도록 아세트아미노펜 최대량을 낮춥니다.
+    max_dose_db = {"아세트아미노펜": 1500}
+    built = build_samples(max_dose_db=max_dose_db)
+    assert set(built["conflict_graph"]) == {med["name"] for med in built["medications"]}
+    assert built["conflict_graph"]["타이레놀정500mg"]
+
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(built, ensure_ascii=False), encoding="utf-8")
+    medications, derived = med_db.read_catalog_file(str(path))
+    monkeypatch.setattr(med_db, "CATALOG_PATH", str(path))
+    monkeypatch.setattr(med_db, "MED_DB", medications)
+    monkeypatch.setattr(med_db, "CATALOG_DERIVED", derived)
+    assert dict(catalog._builtin_catalog().conflict_graph) == built["conflict_graph"]
+
+    # 그래프가 없는 이전 형식 파일이면 그 약품 목록으로 다시 계산합니다.
+    monkeypatch.setattr(med_db, "CATALOG_DERIVED", {})
+    monkeypatch.setattr(med_db, "MAX_DOSE_DB", max_dose_db)
+    assert dict(catalog._builtin_catalog().conflict_graph) == built["conflict_graph"]
+
+
+def write_xml(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<response><body><items>")
+        for i in range(count):
+            f.write(f"<item><ITEM_SEQ>{i}</ITEM_SEQ><INGR_NAME>아세트아미노펜</INGR_NAME>"
+                    f"<QNT>500</QNT><UNIT>mg</UNIT></item>")
+        f.write("</items></body></response>")
+
+
+def test_xml_records_use_constant_memory(tmp_path):
+    def peak(count):
+        path = str(tmp_path / f"items_{count}.xml")
+        write_xml(path, count)
+        tracemalloc.start()
+        try:
+            records = sum(1 for _ in iter_records(path))
+            return records, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small, small_peak = peak(2000)
+    large, large_peak = peak(40000)
+    assert (small, large) == (2000, 40000)
+    # 읽은 <item>이 트리에 남으면 최대 사용량이 항목 수에 비례해 커집니다.
+    assert large_peak < small_peak * 2
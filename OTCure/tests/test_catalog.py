@@ -0,0 +1,74 @@
+import gc
+import weakref
+
+import audit
+import catalog
+from alternatives import build_alternatives
+from med_db import MAX_DOSE_DB, MED_DB, WARNING_RULES
+from safety import analyze_basket, eligibility_mask
+
+
+def test_snapshot_stores_precomputed_alternatives(tmp_path, monkeypatch):
+    version = catalog.publish_snapshot(tmp_path, MED_DB.values(), MAX_DOSE_DB, WARNING_RULES)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("alternatives should be read from the snapshot")
+
+    # 불러올 때는 스냅샷에 저장된 목록을 그대로 사용하고 다시 계산하지 않습니다.
+    monkeypatch.setattr(catalog, "build_alternatives", fail)
+    snapshot = catalog.load_snapshot(tmp_path, version)
+
+    assert snapshot.version == version
+    # 스냅샷의 약품 키는 Medication.name입니다.
+    assert dict(snapshot.alternatives) == build_alternatives(snapshot.med_db)
+
+
+def test_alternatives_computed_when_missing():
+    snapshot = catalog.Catalog("x", MED_DB, MAX_DOSE_DB, WARNING_RULES)
+    assert dict(snapshot.alternatives) == build_alternatives(MED_DB, snapshot.sorted_ingredients)
+
+
+def test_builtin_digest_covers_limits_and_rules(monkeypatch):
+    import med_db
+
+    digest = catalog._builtin_digest()
+    monkeypatch.setattr(med_db, "MAX_DOSE_DB", dict(MAX_DOSE_DB, 아세트아미노펜=3000))
+    assert catalog._builtin_digest() != digest
+    monkeypatch.setattr(med_db, "MAX_DOSE_DB", MAX_DOSE_DB)
+    monkeypatch.setattr(med_db, "WARNING_RULES", {})
+    assert catalog._builtin_digest() != digest
+    monkeypatch.setattr(med_db, "WARNING_RULES", WARNING_RULES)
+    monkeypatch.setattr(catalog, "load_conflict_graph", lambda: {})
+    assert catalog._builtin_digest() != digest
+
+
+def test_store_swaps_to_new_version_and_releases_old_snapshot(tmp_path):
+    meds = list(MED_DB.values())
+    first = catalog.publish_snapshot(tmp_path, meds, MAX_DOSE_DB, WARNING_RULES)
+    store = catalog.CatalogStore(str(tmp_path))
+    old = store.current()
+    assert old.version == first
+    assert not store.reload_if_changed()
+
+    # 이전 스냅샷으로 캐시를 채워 둡니다.
+    names = frozenset(list(old.med_db)[:2])
+    analyze_basket(old, names)
+    eligibility_mask(old, True, False, frozenset())
+    audit._daily_exceeded(old, ((next(iter(names)), 1),))
+    assert analyze_basket(old, names) is analyze_basket(old, names)
+
+    second = catalog.publish_snapshot(tmp_path, meds[1:], MAX_DOSE_DB, WARNING_RULES)
+    assert second != first
+    assert store.reload_if_changed()
+    current = store.current()
+    assert current.version == second
+    assert len(current.med_db) == len(meds) - 1
+    # 교체 전에 받은 스냅샷은 그대로 이전 버전입니다.
+    assert old.version == first and len(old.med_db) == len(meds)
+    assert analyze_basket(current, names) is not analyze_basket(old, names)
+
+    # 이전 스냅샷을 쓰는 곳이 없어지면 캐시가 붙잡지 않고 해제됩니다.
+    ref = weakref.ref(old)
+    del old
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,87 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from catalog import Catalog
+from conflicts import build_conflict_graph, conflicts_for
+from med_db import MAX_DOSE_DB, Medication
+from safety import daily_dose_count
+
+LIMITS = {"아세트아미노펜": 4000, "카페인무수물": 400}
+
+
+def make_catalog(count, seed=0):
+    rng = random.Random(seed)
+    meds = {}
+    for i in range(count):
+        ingredients = {"아세트아미노펜": rng.choice([80, 160, 325, 500, 650])}
+        if rng.random() < 0.5:
+            ingredients["카페인무수물"] = rng.choice([30, 50, 100])
+        usage = rng.choice(["1일 2회", "1일 3회", "1일 4회", "1일 최대 8정"])
+        meds[f"약품{i}"] = Medication(f"약품{i}", "", usage, ingredients, "해열진통제", 0, 0, "")
+    return meds
+
+
+def daily(med, ing):
+    return med.ingredients.get(ing, 0) * daily_dose_count(med)
+
+
+def over(meds, names):
+    """조합의 모든 약품이 함께 포함하는 성분 중 하루 합계가 최대량을 넘는 성분"""
+    return [
+        ing for ing, limit in LIMITS.items()
+        if all(ing in meds[n].ingredients for n in names)
+        and sum(daily(meds[n], ing) for n in names) > limit
+    ]
+
+
+def test_over_limit_pairs_match_brute_force_when_under_bound():
+    meds = make_catalog(12)
+    graph = build_conflict_graph(meds, LIMITS, per_product=len(meds))
+    for name in meds:
+        expected = {
+            other for other in meds
+            if other != name and over(meds, (name, other))
+        }
+        found = {entry["with"][0] for entry in graph[name] if len(entry["with"]) == 1}
+        assert found == expected
+
+
+def test_stored_triples_are_valid_and_minimal():
+    meds = make_catalog(40, seed=1)
+    graph = build_conflict_graph(meds, LIMITS)
+    for name, entries in graph.items():
+        for entry in entries:
+            combo = [name] + entry["with"]
+            assert set(entry["ingredients"]) <= set(over(meds, combo))
+            if len(combo) == 3:
+                assert not any(over(meds, pair) for pair in combinations(combo, 2))
+
+
+def test_graph_is_bounded_and_ranked():
+    meds = make_catalog(600, seed=2)
+    graph = build_conflict_graph(meds, LIMITS, per_product=5)
+    for entries in graph.values():
+        assert len(entries) <= 5
+        keys = [(len(e["with"]), -e["ratio"]) for e in entries]
+        assert keys == sorted(keys)
+
+
+def test_duplicates_are_derived_from_index():
+    meds = make_catalog(30, seed=3)
+    catalog = Catalog("t", meds, LIMITS, {}, build_conflict_graph(meds, LIMITS))
+    conflicts, omitted = conflicts_for(catalog, "약품0", limit=3)
+    duplicates = [c for c in conflicts if c["kind"] == "duplicate"]
+    assert len(duplicates) == 3
+    assert omitted == len(meds) - 1 - 3
+    assert all("아세트아미노펜" in c["ingredients"] for c in duplicates)
+    assert not any(e["kind"] == "duplicate" for entries in catalog.conflict_graph.values() for e in entries)
+
+
+@pytest.mark.parametrize("name", ["타이레놀500mg", "게보린정"])
+def test_builtin_catalog_conflicts(name):
+    from med_db import MED_DB
+    catalog = Catalog("t", MED_DB, MAX_DOSE_DB, {}, build_conflict_graph(MED_DB, MAX_DOSE_DB))
+    conflicts, _ = conflicts_for(catalog, name)
+    assert any(c["kind"] == "duplicate" for c in conflicts)
@@ -0,0 +1,47 @@
+import json
+import threading
+
+from events import EventSink
+
+
+def read_events(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_events_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    sink = EventSink(path, batch_wait=0.01)
+    sink.emit("rule_triggered", rule="Multiple_Antihistamine")
+    sink.emit("save_rejected", products=["게보린정"])
+    sink.close()
+    assert [(e["event"], e["sample_rate"]) for e in read_events(path)] == [
+        ("rule_triggered", 1.0), ("save_rejected", 1.0)
+    ]
+
+
+def test_full_queue_counts_dropped_events(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    sink = EventSink(path, queue_size=2, batch_size=1, batch_wait=0.01)
+    gate, started = threading.Event(), threading.Event()
+    write_batch = sink._write_batch
+
+    def blocked_write(batch):
+        started.set()
+        gate.wait()
+        write_batch(batch)
+
+    # 첫 배치를 쓰는 동안 백그라운드 스레드를 멈춰 두고 큐를 채웁니다.
+    sink._write_batch = blocked_write
+    sink.emit("e0")
+    assert started.wait(timeout=5)
+    for i in range(1, 6):
+        sink.emit(f"e{i}")
+    assert sink.dropped == 3
+
+    gate.set()
+    sink.close()
+    events = read_events(path)
+    assert [e["event"] for e in events if e["event"] != "events_dropped"] == ["e0", "e1", "e2"]
+    assert [e["count"] for e in events if e["event"] == "events_dropped"] == [3]
+    assert sink.dropped == 0
@@ -0,0 +1,82 @@
+import importlib
+import json
+
+import pytest
+
+import log_retention
+from log_retention import compact_log
+from med_db import MED_DB
+from safety import daily_ingredient_totals
+
+TYLENOL = MED_DB["타이레놀500mg"]
+GEVORIN = MED_DB["게보린정"]
+
+
+def entry(day, *meds, time="09:00"):
+    return {"date": day, "time": time, "description": "", "medications": list(meds)}
+
+
+def test_nothing_to_compact_returns_same_list():
+    log = [entry("2026-10-19", TYLENOL)]
+    assert compact_log(log, "2026-10-19", keep_days=7, archive_path=None) is log
+
+
+def test_old_days_are_compacted_with_ingredient_totals():
+    log = [
+        entry("2026-10-01", TYLENOL),
+        entry("2026-10-01", TYLENOL, GEVORIN, time="15:00"),
+        entry("2026-10-19", GEVORIN),
+    ]
+    result = compact_log(log, "2026-10-19", keep_days=7, archive_path=None)
+
+    assert len(result) == 2
+    record = result[0]
+    assert record["compacted"] and record["date"] == "2026-10-01" and record["count"] == 2
+    assert record["ingredients"] == dict(daily_ingredient_totals(log, "2026-10-01"))
+    assert result[1] is log[2]
+    # 압축 후에도 그 날짜의 누적량 계산 결과는 같아야 합니다.
+    assert daily_ingredient_totals(result, "2026-10-01") == daily_ingredient_totals(log, "2026-10-01")
+
+
+def test_recompacting_merges_existing_records():
+    first = compact_log([entry("2026-10-01", TYLENOL)], "2026-10-19", keep_days=7, archive_path=None)
+    log = first + [entry("2026-10-01", GEVORIN)]
+    result = compact_log(log, "2026-10-19", keep_days=7, archive_path=None)
+    assert len(result) == 1
+    assert result[0]["count"] == 2
+
+
+def test_entry_limit_compacts_oldest_days_but_never_today():
+    log = [entry(f"2026-10-{day:02d}", TYLENOL) for day in range(15, 20) for _ in range(3)]
+    result = compact_log(log, "2026-10-19", keep_days=30, max_entries=4, archive_path=None)
+
+    full = [e for e in result if not e.get("compacted")]
+    assert {e["date"] for e in full} == {"2026-10-19"}
+    assert len(full) == 3
+    assert [e["date"] for e in result if e.get("compacted")] == [f"2026-10-{d}" for d in range(15, 19)]
+
+
+def test_archive_receives_original_entries(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    log = [entry("2026-10-01", TYLENOL, GEVORIN), entry("2026-10-19", TYLENOL)]
+    compact_log(log, "2026-10-19", keep_days=7, archive_path=str(path), owner="홍길동")
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert records == [{
+        "date": "2026-10-01", "time": "09:00", "description": "",
+        "medications": [TYLENOL.name, GEVORIN.name], "owner": "홍길동",
+    }]
+
+
+@pytest.mark.parametrize("name, value", [
+    ("OTCURE_LOG_RETENTION_DAYS", "0"),
+    ("OTCURE_LOG_RETENTION_DAYS", "-3"),
+    ("OTCURE_LOG_MAX_ENTRIES", "-1"),
+])
+def test_invalid_env_settings_are_rejected(monkeypatch, name, value):
+    monkeypatch.setenv(name, value)
+    with pytest.raises(ValueError, match=name):
+        importlib.reload(log_retention)
+    monkeypatch.delenv(name)
+    importlib.reload(log_retention)
+    assert log_retention.LOG_RETENTION_DAYS == 7
@@ -0,0 +1,64 @@
+import time
+
+from log_store import LogWriter
+from med_db import MED_DB
+
+TYLENOL = MED_DB["타이레놀500mg"]
+
+
+def entry(description):
+    return {"date": "2026-10-19", "time": "09:00", "description": description, "medications": [TYLENOL]}
+
+
+def test_append_is_written_and_readable(tmp_path):
+    writer = LogWriter(str(tmp_path / "log.jsonl"), batch_wait=0.01)
+    assert writer.append("kim", entry("a"))
+    assert [r["description"] for r in writer.read("kim")] == ["a"]  # 쓰이기 전에도 보임
+    writer.flush()
+    writer.close()
+    assert [r["description"] for r in writer.read("kim")] == ["a"]
+    assert writer.read("lee") == []
+
+
+def test_full_queue_rejects_without_blocking(tmp_path):
+    writer = LogWriter(str(tmp_path / "log.jsonl"), batch_size=1, batch_wait=0.01, queue_size=1)
+    # 파일 잠금을 잡아 백그라운드 스레드가 첫 기록을 쓰는 도중에 멈추게 합니다.
+    with writer._file_lock:
+        assert writer.append("kim", entry("a"))
+        time.sleep(0.1)  # 첫 기록을 꺼내 가서 큐가 빔
+        assert writer.append("kim", entry("b"))
+
+        started = time.perf_counter()
+        assert not writer.append("kim", entry("c"))
+        assert time.perf_counter() - started < 0.1
+        assert writer.overflowed == 1
+        assert [r["description"] for r in writer._pending["kim"]] == ["a", "b"]
+
+    writer.flush()
+    writer.close()
+    assert [r["description"] for r in writer.read("kim")] == ["a", "b"]
+
+
+def test_failed_writes_are_bounded_and_reported(tmp_path):
+    directory = tmp_path / "missing"
+    writer = LogWriter(str(directory / "log.jsonl"), batch_wait=0.05, retry_limit=2)
+    for description in "abcde":
+        assert writer.append("kim", entry(description))
+
+    # 디렉터리가 없어 쓰기에 실패: 오래된 2건만 재시도 대기, 나머지는 버리고 셉니다.
+    assert writer.flush() == 2
+    assert writer.overflowed == 3
+    assert [r["description"] for r in writer.read("kim")] == ["a", "b"]
+
+    directory.mkdir()
+    writer.append("kim", entry("f"))
+    assert writer.flush() == 0
+    assert writer.close() == 0
+    assert [r["description"] for r in writer.read("kim")] == ["a", "b", "f"]
+
+
+def test_close_reports_unwritten_records(tmp_path, capsys):
+    writer = LogWriter(str(tmp_path / "missing" / "log.jsonl"), batch_wait=0.01)
+    writer.append("kim", entry("a"))
+    assert writer.close() == 1
+    assert "1 unwritten records" in capsys.readouterr().out
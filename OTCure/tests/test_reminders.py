@@ -0,0 +1,62 @@
+import threading
+from datetime import datetime, timedelta
+
+from reminders import ReminderScheduler
+
+
+class Recorder:
+    def __init__(self):
+        self.fired = []
+        self.event = threading.Event()
+
+    def __call__(self, user, product, due):
+        self.fired.append((user, product, due))
+        self.event.set()
+
+
+def test_reschedule_replaces_previous_reminder():
+    recorder = Recorder()
+    scheduler = ReminderScheduler(on_fire=recorder)
+    later = datetime.now() + timedelta(hours=1)
+    scheduler.schedule("u1", "타이레놀500mg", later)
+    assert scheduler.pending("u1") == {"타이레놀500mg": later.timestamp()}
+
+    soon = datetime.now() + timedelta(milliseconds=50)
+    scheduler.schedule("u1", "타이레놀500mg", soon)
+    assert len(scheduler) == 1
+    assert scheduler.pending("u1") == {"타이레놀500mg": soon.timestamp()}
+
+    assert recorder.event.wait(timeout=5)
+    # 이전 알림(1시간 뒤)은 힙에 남아 있어도 무효이고, 새 알림만 한 번 울립니다.
+    assert recorder.fired == [("u1", "타이레놀500mg", soon.timestamp())]
+    assert len(scheduler) == 0
+    assert scheduler.pending("u1") == {}
+
+
+def test_cancelled_reminder_does_not_fire():
+    recorder = Recorder()
+    scheduler = ReminderScheduler(on_fire=recorder)
+    now = datetime.now()
+    scheduler.schedule("u1", "게보린정", now + timedelta(milliseconds=300))
+    scheduler.schedule("u1", "타이레놀500mg", now + timedelta(milliseconds=600))
+    scheduler.cancel("u1", "게보린정")
+    scheduler.cancel("u1", "없는약품")  # 예약되지 않은 약품은 무시
+    assert set(scheduler.pending("u1")) == {"타이레놀500mg"}
+
+    assert recorder.event.wait(timeout=5)
+    assert [product for _, product, _ in recorder.fired] == ["타이레놀500mg"]
+
+
+def test_fired_reminders_are_delivered_to_inbox():
+    scheduler = ReminderScheduler()
+    due = datetime.now() - timedelta(seconds=1)
+    scheduler.schedule("u1", "게보린정", due)
+    scheduler.schedule("u2", "타이레놀500mg", due)
+
+    for _ in range(100):
+        if len(scheduler) == 0:
+            break
+        threading.Event().wait(0.05)
+    assert scheduler.drain("u1") == [("게보린정", due.timestamp())]
+    assert scheduler.drain("u1") == []
+    assert scheduler.drain("u2") == [("타이레놀500mg", due.timestamp())]
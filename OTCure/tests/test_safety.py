@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from med_db import MED_DB
+from safety import next_dose_time
+
+TYLENOL = MED_DB["타이레놀500mg"]  # 4시간 간격, 1일 최대 8정
+GEVORIN = MED_DB["게보린정"]  # 4시간 간격, 1일 3회 (용법에 횟수 없음 → 기본값)
+NOW = datetime(2026, 10, 19, 12, 0)
+TOMORROW = datetime(2026, 10, 20, 0, 0)
+
+
+def entry(day, time, *meds):
+    return {"date": day, "time": time, "description": "", "medications": list(meds)}
+
+
+def test_no_doses_today_can_take_now():
+    log = [entry("2026-10-18", "23:00", TYLENOL)]
+    assert next_dose_time(log, TYLENOL, NOW) == NOW
+
+
+def test_waits_for_interval_after_last_dose():
+    log = [entry("2026-10-19", "07:00", TYLENOL), entry("2026-10-19", "10:30", TYLENOL)]
+    assert next_dose_time(log, TYLENOL, NOW) == datetime(2026, 10, 19, 14, 30)
+
+
+def test_interval_already_passed():
+    log = [entry("2026-10-19", "07:00", GEVORIN)]
+    assert next_dose_time(log, GEVORIN, NOW) == NOW
+
+
+def test_daily_dose_count_reached_waits_until_tomorrow():
+    log = [entry("2026-10-19", t, GEVORIN) for t in ("00:00", "04:00", "08:00")]
+    assert next_dose_time(log, GEVORIN, NOW) == TOMORROW
+
+
+def test_daily_limit_counts_other_products():
+    # 아세트아미노펜 3600mg 복용 후 500mg을 더하면 4000mg 초과
+    log = [entry("2026-10-19", "06:00", TYLENOL, TYLENOL, TYLENOL, TYLENOL, TYLENOL, TYLENOL, GEVORIN, GEVORIN)]
+    assert next_dose_time(log, TYLENOL, NOW) == TOMORROW
+    # 횟수(6/8)와 간격은 여유가 있으므로 최대 복용량이 없으면 지금 복용 가능
+    assert next_dose_time(log, TYLENOL, NOW, max_dose_db={}) == NOW
+
+
+def test_compacted_entries_are_ignored_for_interval():
+    log = [{"date": "2026-10-19", "compacted": True, "count": 1, "ingredients": {"아세트아미노펜": 500}}]
+    assert next_dose_time(log, TYLENOL, NOW) == NOW
@@ -0,0 +1,107 @@
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from catalog import builtin_catalog
+from server import MAX_BODY_BYTES, RequestError, SafetyCheckHandler, handle_check, handle_check_log
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return builtin_catalog()
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SafetyCheckHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(address, path, body, headers=None):
+    conn = http.client.HTTPConnection(*address, timeout=5)
+    data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    conn.request("POST", path, body=data, headers=headers or {})
+    response = conn.getresponse()
+    payload = json.loads(response.read() or b"null")
+    conn.close()
+    return response.status, payload
+
+
+def test_check_reports_duplicates(catalog):
+    result = handle_check(catalog, {"products": ["타이레놀500mg", "게보린정", "없는약"]})
+    assert "아세트아미노펜" in result["duplicates"]
+    assert result["unknown"] == ["없는약"]
+
+
+@pytest.mark.parametrize("body", [
+    {"products": "타이레놀500mg"},
+    {"products": [["타이레놀500mg"]]},
+    {"products": [{"name": "타이레놀500mg"}]},
+])
+def test_check_rejects_malformed_products(catalog, body):
+    with pytest.raises(RequestError):
+        handle_check(catalog, body)
+
+
+@pytest.mark.parametrize("body", [
+    {"products": [], "log": ["x"]},
+    {"products": [], "log": {"date": "2026-10-19"}},
+    {"products": [], "log": [{"date": 20261019, "products": []}]},
+    {"products": [], "date": 20261019},
+])
+def test_check_log_rejects_malformed_log(catalog, body):
+    with pytest.raises(RequestError):
+        handle_check_log(catalog, body)
+
+
+@pytest.mark.parametrize("body", [
+    {"products": [["a"]]},
+    {"products": [], "log": ["x"]},
+    [1, 2],
+    b"{not json",
+])
+def test_malformed_requests_get_400(server, body):
+    path = "/check-log" if isinstance(body, dict) and "log" in body else "/check"
+    status, payload = post(server, path, body)
+    assert status == 400
+    assert "error" in payload
+
+
+def test_invalid_content_length_gets_400(server):
+    status, payload = post(server, "/check", b"{}", headers={"Content-Length": "abc"})
+    assert status == 400
+
+
+def test_oversized_body_gets_413(server):
+    status, payload = post(server, "/check", b"{}", headers={"Content-Length": str(MAX_BODY_BYTES + 1)})
+    assert status == 413
+
+
+def test_store_is_not_watched_before_fork(tmp_path, monkeypatch):
+    import catalog as catalog_module
+
+    monkeypatch.setattr(catalog_module, "_store", None)
+    monkeypatch.setattr(catalog_module, "CATALOG_DIR", str(tmp_path))
+    store = catalog_module.get_store(start=False)
+    assert store._thread is None
+    assert catalog_module.get_store() is store and store._thread is None
+    store.start()
+    assert store._thread.is_alive()
+
+
+def test_check_log_over_limit(server):
+    status, payload = post(server, "/check-log", {
+        "products": ["타이레놀500mg"] * 2,
+        "log": [{"date": "2026-10-19", "products": ["타이레놀500mg"] * 7}],
+        "date": "2026-10-19",
+    })
+    assert status == 200
+    assert payload["allowed"] is False
+    assert "아세트아미노펜" in payload["exceeded"]
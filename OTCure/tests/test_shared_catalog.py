@@ -0,0 +1,120 @@
+import fcntl
+import gc
+import os
+import threading
+
+import pytest
+
+import shared_catalog
+from catalog import Catalog, _builtin_catalog
+from conflicts import build_conflict_graph
+from med_db import MAX_DOSE_DB, MED_DB, WARNING_RULES
+
+
+def round_trip(catalog, tmp_path):
+    path = str(tmp_path / "segment.bin")
+    shared_catalog.export_segment(catalog, path)
+    return Catalog.from_segment(shared_catalog.SharedSegment(path))
+
+
+def assert_same(shared, catalog):
+    assert shared.version == catalog.version
+    assert list(shared.med_db) == list(catalog.med_db)
+    for name, med in catalog.med_db.items():
+        assert vars(shared.med_db[name]) == vars(med)
+    assert "없는약품" not in shared.med_db
+    assert dict(shared.max_dose_db) == dict(catalog.max_dose_db)
+    assert dict(shared.warning_rules) == dict(catalog.warning_rules)
+    assert shared.sorted_ingredients == catalog.sorted_ingredients
+    assert dict(shared.order) == dict(catalog.order)
+    assert dict(shared.alternatives) == dict(catalog.alternatives)
+    assert dict(shared.ingredient_index) == dict(catalog.ingredient_index)
+    assert dict(shared.conflict_graph) == {name: catalog.conflict_graph.get(name, []) for name in catalog.med_db}
+
+
+def test_builtin_catalog_round_trip(tmp_path):
+    catalog = _builtin_catalog()
+    assert any(catalog.conflict_graph.values())
+    assert_same(round_trip(catalog, tmp_path), catalog)
+
+
+def test_round_trip_with_duplicate_entries_and_small_limits(tmp_path):
+    # 이전 형식 스냅샷의 "duplicate" 항목(ratio 없음)과 좁은 한도의 그래프도 그대로 돌아와야 합니다.
+    graph = build_conflict_graph(MED_DB, dict(MAX_DOSE_DB, 아세트아미노펜=1500), per_product=3)
+    name = next(iter(MED_DB))
+    graph[name] = [{"with": [list(MED_DB)[1]], "kind": "duplicate", "ingredients": ["아세트아미노펜"]}] + graph[name]
+    catalog = Catalog("v1", MED_DB, MAX_DOSE_DB, WARNING_RULES, graph)
+    shared = round_trip(catalog, tmp_path)
+    assert_same(shared, catalog)
+    assert "ratio" not in shared.conflict_graph[name][0]
+
+
+def test_empty_graph_round_trip(tmp_path):
+    catalog = Catalog("v1", MED_DB, MAX_DOSE_DB, WARNING_RULES, {})
+    assert_same(round_trip(catalog, tmp_path), catalog)
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a segment" * 10)
+    with pytest.raises(ValueError):
+        shared_catalog.SharedSegment(str(path))
+
+
+def test_medication_cache_is_thread_safe(tmp_path):
+    path = str(tmp_path / "segment.bin")
+    shared_catalog.export_segment(_builtin_catalog(), path)
+    med_db = shared_catalog.SharedMedDB(shared_catalog.SharedSegment(path), cache_size=4)
+    names = list(med_db)
+    errors = []
+
+    def work():
+        try:
+            for _ in range(50):
+                for name in names:
+                    assert med_db[name].name
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(med_db._cache) == 4
+
+
+def test_export_removes_only_unused_segments(tmp_path):
+    unused = ["otcure-catalog-v2-old.bin", "otcure-catalog-v2-old.bin.lock", "otcure-catalog-v2-old.bin.tmp-99",
+              "otcure-catalog-builtin-1234.bin"]
+    in_use = ["otcure-catalog-v2-live.bin", "otcure-catalog-v2-live.bin.lock"]
+    for name in unused + in_use + ["unrelated.bin"]:
+        (tmp_path / name).write_bytes(b"x")
+
+    # 다른 워커가 live 세그먼트에 붙어 있는 상태 (파일 나이와 관계없이 지우면 안 됨)
+    with open(tmp_path / "otcure-catalog-v2-live.bin.lock", "a") as live:
+        fcntl.flock(live, fcntl.LOCK_SH)
+        segment = shared_catalog.attach_or_export(str(tmp_path), "new", _builtin_catalog)
+
+    assert segment.version == "builtin"
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        in_use + ["unrelated.bin", "otcure-catalog-v2-new.bin", "otcure-catalog-v2-new.bin.lock"]
+    )
+
+
+def test_attached_segment_is_kept_until_released(tmp_path):
+    directory = str(tmp_path)
+    first = shared_catalog.attach_or_export(directory, "first", _builtin_catalog)
+    # 같은 세그먼트에 다시 붙어도 내보내지 않습니다.
+    again = shared_catalog.attach_or_export(directory, "first", lambda: pytest.fail("exported twice"))
+    assert again.version == first.version
+
+    shared_catalog.attach_or_export(directory, "second", _builtin_catalog)
+    assert os.path.exists(shared_catalog.segment_path(directory, "first"))
+
+    # 붙어 있던 세그먼트를 모두 놓으면 다음 정리에서 지워집니다.
+    del first, again
+    gc.collect()
+    assert shared_catalog.remove_stale_segments(directory, shared_catalog.segment_path(directory, "second")) == 1
+    assert sorted(os.listdir(tmp_path)) == ["otcure-catalog-v2-second.bin", "otcure-catalog-v2-second.bin.lock"]
@@ -0,0 +1,36 @@
+import queue
+import threading
+
+from write_behind import STOP, collect_batch, run_batches
+
+
+def test_collect_batch_limits_size_and_sees_stop():
+    q = queue.Queue()
+    for item in range(5):
+        q.put(item)
+    q.put(STOP)
+    assert collect_batch(q, 3, 0.01) == ([0, 1, 2], False)
+    assert collect_batch(q, 3, 0.01) == ([3, 4], True)
+
+
+def test_collect_batch_returns_after_wait():
+    q = queue.Queue()
+    q.put("a")
+    assert collect_batch(q, 10, 0.01) == (["a"], False)
+
+
+def test_run_batches_marks_items_done():
+    q = queue.Queue()
+    batches = []
+    thread = threading.Thread(target=run_batches, args=(q, batches.append, 2, 0.01))
+    thread.start()
+    for item in range(5):
+        q.put(item)
+    q.join()  # 모든 항목에 task_done이 호출되어야 반환됩니다.
+    q.put(STOP)
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert [item for batch in batches for item in batch] == list(range(5))
+    assert all(len(batch) <= 2 for batch in batches)
+    assert batches[-1] == []  # STOP만 받은 마지막 배치
@@ -0,0 +1,49 @@
+"""
+write-behind 큐의 배치 수집 루프 (log_store.py, events.py 공용).
+
+호출한 쪽은 제한된 크기의 queue.Queue에 넣기만 하고, 백그라운드 스레드가 run_batches()로
+첫 항목을 기다린 뒤 batch_wait 동안 더 모아 최대 batch_size개씩 한 번에 처리합니다.
+STOP을 넣으면 그 앞까지 처리하고 끝나며, 꺼낸 항목마다 task_done()을 호출하므로
+Queue.join()으로 넣은 항목이 모두 처리될 때까지 기다릴 수 있습니다.
+"""
+import queue
+
+STOP = object()
+
+
+def collect_batch(q, batch_size, batch_wait):
+    """
+    q에서 첫 항목을 기다려 꺼낸 뒤 batch_wait초씩 더 기다리며 batch_size개까지 모읍니다.
+    (항목 목록, STOP을 받았는지)를 반환합니다.
+    """
+    item = q.get()
+    if item is STOP:
+        return [], True
+    batch = [item]
+    while len(batch) < batch_size:
+        try:
+            item = q.get(timeout=batch_wait)
+        except queue.Empty:
+            break
+        if item is STOP:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+def run_batches(q, handle_batch, batch_size, batch_wait):
+    """
+    STOP을 받을 때까지 배치를 모아 handle_batch(batch)를 호출합니다 (백그라운드 스레드 본문).
+    STOP과 함께 받은 마지막 배치는 비어 있을 수 있습니다.
+    """
+    while True:
+        batch, stop = collect_batch(q, batch_size, batch_wait)
+        received = len(batch) + (1 if stop else 0)
+        try:
+            if batch or stop:
+                handle_batch(batch)
+        finally:
+            for _ in range(received):
+                q.task_done()
+        if stop:
+            return